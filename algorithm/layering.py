@@ -0,0 +1,122 @@
+from array import array
+from collections import deque
+from util.profiling import count
+
+
+# Both layering engines label every half-edge of the embedding with a level,
+# and treat an edge as still part of the graph while its level is at least the
+# current E-outerplanarity. Walking the outer face of what is left is then a
+# walk of the embedding that steps over every half-edge with a lower level,
+# and the edges of layer L are exactly the half-edges with level L. Nothing is
+# ever deleted from (or copied out of) the graph itself.
+class Layering(object):
+    def __init__(self, embedding):
+        self.embedding = embedding
+        self.current = 0
+
+    def has_edges(self, v):
+        for h in self.embedding.out_edges(v):
+            if self.level[h] >= self.current:
+                return True
+        return False
+
+    # walk goes clockwise around the outer face of the graph of every edge
+    # with a level of at least the current level, starting at start. It
+    # returns the vertices in the order they were visited, the set of edges
+    # walked and every edge walked in order (edges walked twice belong to a
+    # tree).
+    def walk(self, start):
+        target = self.embedding.target
+        twin = self.embedding.twin
+        rot_next = self.embedding.rot_next
+        level = self.level
+        current_level = self.current
+
+        path = []
+        edges_traversed = set()
+        total_edges_traversed = []
+
+        h = self.embedding.offsets[start]
+        while level[h] < current_level:
+            h = rot_next[h]
+
+        current = start
+        x = 0
+        while True:
+            x += 1
+            # Every half-edge is walked at most once.
+            assert x <= len(target)
+            path.append(current)
+
+            next = target[h]
+            edge = (min(current, next), max(current, next))
+            edges_traversed.add(edge)
+            total_edges_traversed.append(edge)
+            current = next
+
+            # Take the next clockwise edge that has not been peeled away.
+            t = twin[h]
+            h = rot_next[t]
+            while h != t and level[h] < current_level:
+                h = rot_next[h]
+
+            if current == start:
+                break
+        count("outer_face_vertices", len(path))
+        return path, edges_traversed, total_edges_traversed
+
+
+# PeelLayering finds each E-outerplanarity layer by walking the outer face of
+# what is left of the graph, and then peels those edges away by giving them
+# the current level. Edges that have not been peeled yet have a level larger
+# than any layer.
+class PeelLayering(Layering):
+    def __init__(self, embedding):
+        Layering.__init__(self, embedding)
+        self.level = array('l', [len(embedding.target)] * len(embedding.target))
+
+    def remove(self, remove):
+        for v, u in remove:
+            h = self.embedding.half_edge(v, u)
+            self.level[h] = self.current
+            self.level[self.embedding.twin[h]] = self.current
+        self.current += 1
+
+
+# FaceLayering assigns every edge its E-outerplanarity level up front.
+#
+# Peeling away the edges of the outer face merges every face adjacent to it
+# into the new outer face. So the level of a face is its breadth first search
+# distance from the outer face in the dual graph, and the level of an edge is
+# the smaller level of the two faces on either side of it. The walk of layer L
+# visits each edge of layer L at most twice, and every face and edge is
+# handled a constant number of times, so the whole layering is linear in the
+# size of the graph.
+class FaceLayering(Layering):
+    def __init__(self, embedding, start):
+        Layering.__init__(self, embedding)
+        face = embedding.face
+        twin = embedding.twin
+
+        # The first half-edge clockwise from twelve o'clock at the upper left
+        # most vertex is always on the outer face.
+        outer = face[embedding.offsets[start]]
+        depth = array('l', [-1] * embedding.face_count())
+        depth[outer] = 0
+        to_visit = deque([outer])
+        while to_visit:
+            f = to_visit.popleft()
+            for h in embedding.face_edges(f):
+                g = face[twin[h]]
+                if depth[g] == -1:
+                    depth[g] = depth[f] + 1
+                    to_visit.append(g)
+
+        self.level = array('l', [0] * len(face))
+        for h in range(len(face)):
+            self.level[h] = min(depth[face[h]], depth[face[twin[h]]])
+
+    def remove(self, remove):
+        # The edges of this layer are exactly those at the current level, so
+        # there is nothing to peel.
+        self.current += 1
@@ -0,0 +1,34 @@
+from algorithm.reassemble import algorithmKS, max_alpha
+from algorithm.preprocess import start_phase
+from util.reassembly_state import ReassemblyState
+from util.reassembly_result import ReassemblyResult
+from util.half_edge import HalfEdgeGraph
+from util.profiling import span
+from util.graph_spec import *
+
+# Nothing in this module (or anything it imports) may depend on graphics, so
+# that a reassembly can be computed on a machine without a display.
+
+
+def run_ks(vertices, check_valid=True):
+    # The embedding only depends on the positions, so it is built once and
+    # shared by every layer.
+    with span("embedding"):
+        embedding = HalfEdgeGraph(vertices)
+    planarity, layer_states = start_phase(vertices, embedding, "faces")
+    rs = ReassemblyState(vertices, planarity)
+    algorithmKS(layer_states, rs, planarity, check_valid)
+    return planarity, layer_states, rs
+
+
+# reassemble runs the preprocessing phase and the KS Algorithm on vertices and
+# returns a ReassemblyResult, or None if the graph is not a valid 1-3 graph.
+# vertices may be a list of Vertex objects or a CSRGraph, and check_valid is
+# a bool or one of validation_levels ("off", "structural" or "full").
+def reassemble(vertices, check_valid=True):
+    if not check_one_three(vertices):
+        return None
+
+    crop_graph(vertices)
+    planarity, layer_states, rs = run_ks(vertices, check_valid)
+    return ReassemblyResult(rs, planarity, max_alpha(rs))
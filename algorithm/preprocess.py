@@ -1,30 +1,14 @@
-from copy import deepcopy
 from itertools import chain
 from collections import Counter, OrderedDict
 from util.layer_state import LayerState
+from util.layer_graph import LayerGraph
+from util.half_edge import HalfEdgeGraph
+from algorithm.layering import FaceLayering, PeelLayering
+from util import memory
+from util.profiling import span, traced
 from util.graph_spec import *
 
 
-# build_layer returns a dict containining all the verticesand edges at particular E-Outerplanarity.
-def build_layer(blank_verts, remove):
-    vertices = dict()
-    for v, u in remove:
-        if v not in vertices:
-            vertices[v] = deepcopy(blank_verts[v])
-        if u not in vertices:
-            vertices[u] = deepcopy(blank_verts[u])
-        vertices[v].add_edge(u)
-        vertices[u].add_edge(v)
-    return vertices
-
-
-# remove_layer is the inverse function to build_layer and removes all the edges from a list of vertices at a partiulcar E-Outerplanarity level.
-def remove_layer(vertices, remove):
-    for v, u in remove:
-        vertices[v].remove_edge(u)
-        vertices[u].remove_edge(v)
-
-
 def parse_cycles(vertices, visited, edges_traversed):
     count = Counter(edges_traversed)
     visited = set(visited)
@@ -77,7 +61,7 @@ def parse_trees(vertices, visited, edges_traversed, cycles, cycle_verts):
     cycle_verts = set(cycle_verts)
     trees = []
     support_sets = []
-    marked = deepcopy(cycle_verts)
+    marked = set(cycle_verts)
     flat_cycles = set(chain(*cycles))
 
     # Like above we can do a simple BFS, but we must also keep track of when we
@@ -116,8 +100,26 @@ def parse_trees(vertices, visited, edges_traversed, cycles, cycle_verts):
     return trees, support_sets
 
 
-def start_phase(full_vertices, blank_verts):
+@traced
+def start_phase(full_vertices, embedding=None, layering="peel"):
+    planarity, layer_states = build_layers(full_vertices, embedding, layering)
+    link_layers(layer_states)
+    return planarity, layer_states
+
+
+# layering selects how the edges of each layer are found. "peel" walks the
+# outer face of what is left of the graph and then peels it away, while
+# "faces" computes every level at once with FaceLayering. Neither modifies
+# full_vertices, and every layer is an overlay on it rather than a copy.
+@traced
+def build_layers(full_vertices, embedding=None, layering="peel"):
+    if embedding is None:
+        embedding = HalfEdgeGraph(full_vertices)
     path = [upper_left_most(full_vertices, range(len(full_vertices)))]
+    if layering == "faces":
+        layers = FaceLayering(embedding, path[0])
+    else:
+        layers = PeelLayering(embedding)
     # Let the current E-outerplanarity level be 0
     planarity = 0
 
@@ -145,29 +147,31 @@ def start_phase(full_vertices, blank_verts):
 
         # The edge of this particular E-outerplanarity are now, defined to be
         # all the edges traversed which are contained in path.
-        for v in path:
-            if len(full_vertices[v]) != 0 and v not in remove_set:
-                current_path, current_remove, edges_traversed = outer_face(
-                    full_vertices, v)
-
-                layers_paths.append(current_path)
-                all_edges_traversed.append(edges_traversed)
-                n_path.append(current_path)
-                remove += current_remove
-
-                for w, u in current_remove:
-                    remove_set.add(w)
-                    remove_set.add(u)
-                    if ls_a:
-                        c = ls_a.vertex_to_cycle[v]
-                        vertex_to_cycle_above[w] = c
-                        vertex_to_cycle_above[u] = c
+        with span("outer_face", layer=planarity):
+            for v in path:
+                if layers.has_edges(v) and v not in remove_set:
+                    current_path, current_remove, edges_traversed = \
+                        layers.walk(v)
+
+                    layers_paths.append(current_path)
+                    all_edges_traversed.append(edges_traversed)
+                    n_path.append(current_path)
+                    remove += current_remove
+
+                    for w, u in current_remove:
+                        remove_set.add(w)
+                        remove_set.add(u)
+                        if ls_a:
+                            c = ls_a.vertex_to_cycle[v]
+                            vertex_to_cycle_above[w] = c
+                            vertex_to_cycle_above[u] = c
 
         path = list(chain(*n_path))
 
-        remove_layer(full_vertices, remove)
+        layers.remove(remove)
 
-        vertices = build_layer(blank_verts, remove)
+        vertices = LayerGraph(full_vertices, embedding, layers.level,
+                              planarity, remove)
 
         all_degree_two = True
         for v in path:
@@ -190,25 +194,41 @@ def start_phase(full_vertices, blank_verts):
 
         else:
             for i, edges in enumerate(all_edges_traversed):
-                n_cycles, n_cycle_verts = parse_cycles(vertices, n_path[i],
-                                                       edges)
-                n_trees, n_supports = parse_trees(vertices, n_path[i], edges,
-                                                  n_cycles, n_cycle_verts)
+                with span("parse_cycles", layer=planarity):
+                    n_cycles, n_cycle_verts = parse_cycles(
+                        vertices, n_path[i], edges)
+                with span("parse_trees", layer=planarity):
+                    n_trees, n_supports = parse_trees(vertices, n_path[i],
+                                                      edges, n_cycles,
+                                                      n_cycle_verts)
                 cycles += n_cycles
                 trees += n_trees
                 supports += n_supports
                 cycle_verts.update(n_cycle_verts)
 
-        layer_states.append(
-            LayerState(vertices, cycles, cycle_verts, trees, supports,
-                       layers_paths, vertex_to_cycle_above))
+        with span("LayerState", layer=planarity):
+            layer_states.append(
+                LayerState(vertices, cycles, cycle_verts, trees, supports,
+                           layers_paths, vertex_to_cycle_above, embedding))
+        memory.checkpoint("start_phase[%d]" % planarity,
+                          exclude=(full_vertices, embedding),
+                          layer_state=layer_states[-1])
 
         # Increment the E-outerplanarity by 1
         planarity += 1
 
-    for i, ls in enumerate(layer_states[1:]):
-        ls.set_path_above(layer_states[i])
     # We actual overcount the planarity by 1, because we run once with 
     # path = [] for a full go before the loop terminates.
     planarity -= 1
     return planarity, layer_states
+
+
+# link_layers lets every layer know about the cycles of the layer enclosing it.
+def link_layers(layer_states):
+    for i, ls in enumerate(layer_states[1:]):
+        ls.set_path_above(layer_states[i])
+    if len(layer_states) != 0:
+        memory.checkpoint("set_path_above",
+                          graph=layer_states[0].vertices.base,
+                          embedding=layer_states[0].embedding,
+                          layer_states=layer_states)
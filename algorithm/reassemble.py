@@ -1,8 +1,14 @@
 from enum import Enum, unique
 from copy import deepcopy
 from collections import deque
-from math import pi, atan2
+from array import array
 from util.graph_spec import upper_left_most
+from util.reassembly_state import SINGLE
+from util import memory, profiling
+from util.profiling import count, traced
+
+
+validation_levels = ("off", "structural", "full")
 
 
 @unique
@@ -21,7 +27,17 @@ class Ops(Enum):
 # higher their priority in the queue their priority, because they are more
 # recent and because cycles may be waiting for them to collapse before the
 # cycle as a whole can merge.
+@traced
 def algorithmKS(layer_states, rs, planarity, check_valid):
+    run_operations(layer_states, rs, planarity)
+
+    # AlgorithmKS has finished running, but we now test the results to confirm
+    # their correctness.
+    validate(layer_states, rs, validation_level(check_valid))
+
+
+@traced
+def run_operations(layer_states, rs, planarity):
     if planarity == 1:
         # Not equipped to handle planarity == 1
         assert False
@@ -32,69 +48,96 @@ def algorithmKS(layer_states, rs, planarity, check_valid):
     # While any queue is not empty, pop the oldest tree in the queue at the
     # deepest E-outerplanarity level. If the tree has not collapsed, collapse
     # the tree. Otherwise, merge the tree.
-    done = False
-    while not done:
-        done = True
-        for layer in range(planarity - 1, -1, -1):
-            operations = rs.operations[layer]
-            if len(operations) == 0:
-                continue
-            done = False
-            op, arg = operations.popleft()
-
-            if op == Ops.COLLAPSE_TYPE_A:
-                collapse_type_a(layer_states, layer, rs, arg)
-            elif op == Ops.COLLAPSE_TYPE_B:
-                collapse_type_b(layer_states, layer, rs, arg)
-            elif op == Ops.MERGE_TYPE_A:
-                merge_type_a(layer_states, layer, rs, arg)
-            elif op == Ops.MERGE_TYPE_B:
-                merge_type_b(layer_states, layer, rs, arg)
-            else:
-                raise ("Invalid operation")
+    while True:
+        next_op = rs.operations.pop()
+        if next_op == None:
             break
+        layer, op, arg = next_op
+        if profiling.counting:
+            count("ops_popped[%d]" % layer)
+        operation_handlers[op](layer_states, layer, rs, arg)
+    memory.checkpoint("algorithmKS", graph=rs.vertices,
+                      embedding=layer_states[0].embedding,
+                      layer_states=layer_states, reassembly_state=rs)
+
+
+# max_alpha returns the largest number of edges leaving any step of the
+# reassembly, which circle_plus keeps track of as the steps are added.
+def max_alpha(rs):
+    return rs.max_alpha
+
+
+# ValidationError is raised when a finished reassembly fails validate. It is
+# an AssertionError, like the checks it comes from, but it tells a reassembly
+# that is wrong apart from an assert failing while the algorithm runs.
+class ValidationError(AssertionError):
+    pass
+
+
+# validate checks the reassembly at one of validation_levels:
+#   off         no checks
+#   structural  the merge tree is a valid reassembly of every vertex
+#   full        structural, and max alpha <= 2 * planarity
+# Every check reads the merge tree arrays once, so validating takes linear time.
+@traced
+def validate(layer_states, rs, level="full"):
+    if level == "off":
+        return
+    try:
+        check_reassembly(layer_states, rs, level)
+    except AssertionError as error:
+        raise ValidationError("reassembly failed %s validation" % level) \
+            from error
 
-    # AlgorithmKS has finished running, but we now test the results to confirm
-    # their correctness.
-    rs.build_Blst()
-    if check_valid:
-        validate(layer_states, rs)
-
-
-def alpha_measure(rs, super_node):
-    count = 0
-    for v in super_node:
-        for u in rs.vertices[v]:
-            if not u in super_node:
-                count += 1
-    return count
 
+def check_reassembly(layer_states, rs, level):
+    n = len(rs.vertices)
+    tree = rs.merge_tree
 
-def validate(layer_states, rs):
     # We have collapsed every vertex
-    assert len(rs.collapsed) == len(rs.vertices)
-
-    # The final super vertex contains every vertex
-    assert len(rs.Blst[-1]) == len(rs.vertices)
+    assert len(rs.collapsed) == n
 
     # Every vertex has been indexed
-    assert len(rs.indx) == len(rs.vertices)
-
-    singles = [super_set for super_set in rs.Blst if len(super_set) == 1]
-    # We never collapsed a single vertex more than once
-    assert len(singles) == len(rs.vertices) == len(set(singles))
-
-    # We are never reassembling a duplicate
-    assert len(set(rs.Blst)) == len(rs.Blst)
+    assert len(rs.indx) == n
 
     # We are linear in terms of space complexity
-    assert len(rs.Blst) <= 2 * len(rs.vertices) - 1
-
-    alpha = 0
-    for super_node in rs.Blst:
-        alpha = max(alpha, alpha_measure(rs, super_node))
-    # Make sure our claim that max alpha <= 2*planarity holds.
-    assert alpha <= 2 * len(layer_states)
+    assert len(tree) <= 2 * n - 1
+
+    leaf_of = array('l', [-1]) * n
+    used = bytearray(len(tree))
+    for i in range(len(tree)):
+        if tree.is_leaf(i):
+            v = tree.vertex[i]
+            # We never collapsed a single vertex more than once
+            assert leaf_of[v] == -1
+            leaf_of[v] = i
+            continue
+        # Every other step joins two earlier steps that are not part of any
+        # other step. So two steps either share no vertices or one contains
+        # the other and more, and we are never reassembling a duplicate.
+        for child in (tree.left[i], tree.right[i]):
+            assert 0 <= child < i and not used[child]
+            used[child] = 1
+
+    # Every vertex was collapsed on its own, and every step is part of the
+    # last one, so the final super vertex contains every vertex.
+    assert not -1 in leaf_of
+    assert used.count(0) == 1 and used[-1] == 0
+
+    if level == "full":
+        # Make sure our claim that max alpha <= 2*planarity holds.
+        assert max_alpha(rs) <= 2 * len(layer_states)
+
+
+# validation_level turns the check_valid argument, which is either one of
+# validation_levels or a bool (True for full), into a level.
+def validation_level(check_valid):
+    if check_valid is True:
+        return "full"
+    if check_valid is False or check_valid == None:
+        return "off"
+    assert check_valid in validation_levels
+    return check_valid
 
 
 def assert_get(single_set):
@@ -103,18 +146,6 @@ def assert_get(single_set):
 
 
 def tree_successor(layer_states, layer, rs, tree, super_v):
-    def succ(u):
-        # succ keeps going from a particular vertex around a cycle until it finds an inner vertex
-        # or makes a full circle
-        c, start = ls_a.vertex_to_cycle_index[u]
-        path = ls_a.cycle_paths[c]
-        i = start
-        while True:
-            i = (i + 1) % len(path)
-            if len(ls_a.vertices[path[i]]) == 2 or i == start:
-                break
-        return path[i]
-
     ls = layer_states[layer]
     ls_a = layer_states[layer - 1]
     v_tree = ls.v_by_tree[tree]
@@ -124,7 +155,10 @@ def tree_successor(layer_states, layer, rs, tree, super_v):
     if len(ls.tree_to_nonconsec[tree]) == 0:
         return -1
     last_v = assert_get(ls.tree_to_nonconsec[tree])
-    return succ(last_v)
+    # Keep going clockwise from last_v around its cycle until we find an inner
+    # vertex (or make a full circle).
+    count("cycle_steps")
+    return ls_a.next_inner_vertex[last_v]
 
 
 # prep_cycle is the most complex function in the entire algorith. For a
@@ -140,36 +174,38 @@ def tree_successor(layer_states, layer, rs, tree, super_v):
 # tree (except for one) on a particular cycle is collapsed and merged before
 # the next cycle is handled, a lot less information needs to be juggled and the
 # complexity is reduced.
+@traced
 def prep_cycle(layer_states, layer, rs, cycle):
+    def support_cycle(t):
+        return ls.vertex_to_cycle[next(iter(ls.supports[t]))]
+
     layer = layer + 1
     # Though cycle is on layer, every tree that we wish to prepare for
     # operation is actually on layer + 1 so we adjust our frame of reference
     # one layer deeper in order to make things easier to understand.
     ls = layer_states[layer]
     ls_a = layer_states[layer - 1]
-    cycle_to_type_b_count = dict()
     path = ls_a.cycle_paths[cycle]
-    last_v_with_tree = -1
+    # Rather than walking the path vertex by vertex, we walk the runs of
+    # vertices that belong to the same tree, and instead of rotating the path
+    # we move the index it starts at.
+    profile = ls.cycle_profiles[cycle]
+    cycle_to_type_b_count = dict()
+    last_run = -1
     start_cycle = -1
     marked_trees = set()
-    tree_to_leaf_count = dict()
-    rs.dir_G[path[0]].remove_edge(path[-1])
-    for i, v in enumerate(path):
-        if i < len(path) - 1:
-            rs.dir_G[path[i + 1]].remove_edge(v)
-
-        if not v in ls.vertex_to_tree:
-            continue
-        t = ls.vertex_to_tree[v]
-        if not t in tree_to_leaf_count:
-            tree_to_leaf_count[t] = 0
-        tree_to_leaf_count[t] += 1
-
+    tree_to_leaf_count = dict(profile.leaf_count)
+    count("cycle_steps", len(path))
+    rs.direct_edge(path[-1], path[0])
+    for i in range(len(path) - 1):
+        rs.direct_edge(path[i], path[i + 1])
+
+    for k, t in enumerate(profile.trees):
+        count("cycle_steps")
         if len(ls.supports[t]) != 1:
             continue
-        u = next(iter(ls.supports[t]))
-        c = ls.vertex_to_cycle[u]
-        last_v_with_tree = v
+        c = support_cycle(t)
+        last_run = k
         start_cycle = c
         if t in marked_trees:
             continue
@@ -182,102 +218,73 @@ def prep_cycle(layer_states, layer, rs, cycle):
     # than the one we started on. That way, when we go clockwise from that
     # point we can be sure every tree has all of its vertices in a row when it
     # is collapsed.
-    if last_v_with_tree == -1:
-        for v in path:
-            if not v in ls.vertex_to_tree:
-                continue
-            t = ls.vertex_to_tree[v]
-            tree_to_leaf_count[t] -= 1
+    if last_run == -1:
+        for _, t, length in profile.segments(0):
+            count("cycle_steps")
+            tree_to_leaf_count[t] -= length
             if tree_to_leaf_count[t] != 0:
                 continue
             if t in marked_trees or len(ls.supports[t]) != 0 or len(
                     ls.tree_to_nonconsec[t]) > 1:
                 continue
-            rs.operations[layer].append((Ops.COLLAPSE_TYPE_A, t))
+            rs.operations.push(layer, Ops.COLLAPSE_TYPE_A, t)
             marked_trees.add(t)
         return
 
-    _, i = ls_a.vertex_to_cycle_index[last_v_with_tree]
-    start = i
     # We find the next tree that has support set > 1 or a support set 1 and a
-    # different support cycle.
-    while True:
-        i = (i + 1) % len(path)
-        v = path[i]
-        if i == start:
-            break
-        if v not in ls.vertex_to_tree:
-            continue
-        t = ls.vertex_to_tree[v]
+    # different support cycle, starting after the last vertex of a tree with a
+    # support set 1.
+    start = profile.ends[last_run] - 1
+    origin = start
+    for i, t, _ in profile.segments((start + 1) % len(path)):
+        count("cycle_steps")
         if len(ls.supports[t]) == 0:
             continue
-        if len(ls.supports[t]) > 1:
-            break
-        v = next(iter(ls.supports[t]))
-        c = ls.vertex_to_cycle[v]
-        if c != start_cycle:
+        if len(ls.supports[t]) > 1 or support_cycle(t) != start_cycle:
+            origin = i
             break
 
     # Now we can find a cycle that has all of its Type B single support trees
     # in a row and start the path at the first Type B tree.
-    path = path[i:] + path[:i]
     current_cycle = None
-    start = None
-    for i, v in enumerate(path):
-        if not v in ls.vertex_to_tree:
-            continue
-        t = ls.vertex_to_tree[v]
+    for i, t, length in profile.segments(origin):
+        count("cycle_steps")
         if len(ls.supports[t]) != 1:
             continue
-        u = next(iter(ls.supports[t]))
-        c = ls.vertex_to_cycle[u]
+        c = support_cycle(t)
         if c != current_cycle:
             current_cycle = c
             start = i
-        cycle_to_type_b_count[c] -= 1
-        if cycle_to_type_b_count[c] == 0:
+        cycle_to_type_b_count[c] -= length
+        if cycle_to_type_b_count[c] <= 0:
             break
 
     # Finally, if it is possible to start at a Type A tree without crossing to
     # another cycle we do so.
-    path = path[start:] + path[:start]
+    origin = start
     marked_trees = set()
-    start = i
-    possible = False
-    for i, v in enumerate(path):
-        if not v in ls.vertex_to_tree:
-            continue
-        t = ls.vertex_to_tree[v]
+    for i, t, _ in profile.segments(start):
+        count("cycle_steps")
         if len(ls.supports[t]) == 0:
-            possible = True
+            origin = i
+            break
+        if len(ls.supports[t]) == 1 and support_cycle(t) != current_cycle:
             break
-        if len(ls.supports[t]) == 1:
-            u = next(iter(ls.supports[t]))
-            c = ls.vertex_to_cycle[u]
-            if c != current_cycle:
-                possible = False
-                break
-
-    if possible:
-        path = path[i:] + path[:i]
 
     # Now we collapse Type B trees in a clockwise order with respect to cycle.
     # However, if there is a predecessor to a particular tree A with respect to
     # tree B single support cycle, we will collapse that tree, even if A is
     # clockwise after B with respect to cycle.
-    to_collapse_total = []
-    for v in path:
-        if not v in ls.vertex_to_tree:
-            continue
-        t = ls.vertex_to_tree[v]
+    for _, t, length in profile.segments(origin):
+        count("cycle_steps")
         if t in marked_trees:
             continue
-        tree_to_leaf_count[t] -= 1
+        tree_to_leaf_count[t] -= length
         if tree_to_leaf_count[t] > 0 or len(ls.tree_to_nonconsec[t]) > 1:
             continue
 
         if len(ls.supports[t]) == 0:
-            rs.operations[layer].append((Ops.COLLAPSE_TYPE_A, t))
+            rs.operations.push(layer, Ops.COLLAPSE_TYPE_A, t)
             marked_trees.add(t)
         if len(ls.supports[t]) != 1:
             continue
@@ -291,6 +298,7 @@ def prep_cycle(layer_states, layer, rs, cycle):
         # We found a tree to collapse, but most traverse counterclockwise on its support cycle
         # in order to collapse the tree's successor before we collapse the tree itself.
         while True:
+            count("cycle_steps")
             index = (index - 1) % len(support_path)
             v = support_path[index]
             if not v in ls.vertex_to_tree:
@@ -308,12 +316,13 @@ def prep_cycle(layer_states, layer, rs, cycle):
         while len(t_ordered) != 0:
             t = t_ordered.pop()
             marked_trees.add(t)
-            rs.operations[layer].append((Ops.COLLAPSE_TYPE_B, t))
+            rs.operations.push(layer, Ops.COLLAPSE_TYPE_B, t)
 
 
 # merge cycle is called when we have no incident trees on this cycle that have not been collapsed.
 # So we find a tree incident to this cycle that has a successor that has not merged yet
 # then merge into that. If there is no such tree, then we esclated this super to the cycle above us
+@traced
 def merge_cycle(layer_states, layer, rs, c, super_v):
     ls = layer_states[layer]
     ls_a = layer_states[layer - 1]
@@ -322,6 +331,7 @@ def merge_cycle(layer_states, layer, rs, c, super_v):
 
     # Find the clockwise successor tree of this cycle on the layer enclosing this one.
     for v in ls.cycle_paths[c]:
+        count("cycle_steps")
         if not v in ls.vertex_to_tree:
             continue
         t = ls.vertex_to_tree[v]
@@ -369,6 +379,7 @@ def merge_cycle(layer_states, layer, rs, c, super_v):
         merge_cycle(layer_states, layer - 1, rs, outer_cycle, super_v)
 
 
+@traced
 def prep_incident_tree(layer_states, layer, rs, c, super_v):
     ls = layer_states[layer]
     # There is exactly one tree uncollapsed incident to c
@@ -387,9 +398,10 @@ def prep_incident_tree(layer_states, layer, rs, c, super_v):
         return
     # If the incident tree is ready to collapse, add the incident tree to the queue for this layer so it as a type B tree.
     rs.tree_will_collapse[layer].add(incident_tree)
-    rs.operations[layer].append((Ops.COLLAPSE_TYPE_B, incident_tree))
+    rs.operations.push(layer, Ops.COLLAPSE_TYPE_B, incident_tree)
 
 
+@traced
 def collapse_type_a(layer_states, layer, rs, tree):
     # The collapsing of the tree is handled by collapse_tree, however a lot of data structures
     # are keeping track of both the trees and individual vertices that have been collapsed
@@ -399,7 +411,7 @@ def collapse_type_a(layer_states, layer, rs, tree):
     # Refer to the upper left most vertex of tree as start
     start = upper_left_most(ls.vertices, v_tree)
     # Collapse_tree(tree,v)
-    super_v = collapse_tree(ls.vertices, start, v_tree, rs)
+    super_v = collapse_tree(ls.vertices, start, v_tree, rs, ls.embedding)
     rs.tree_has_collapsed[layer][tree] = True
 
     rs.tree_to_super_out[layer][tree] = super_v
@@ -415,9 +427,10 @@ def collapse_type_a(layer_states, layer, rs, tree):
         rs.collapsed_by_cycle[layer - 1][c].add(v)
 
     # Add tree to the queue for this layer so it merges as a type A tree
-    rs.operations[layer].append((Ops.MERGE_TYPE_A, tree))
+    rs.operations.push(layer, Ops.MERGE_TYPE_A, tree)
 
 
+@traced
 def collapse_type_b(layer_states, layer, rs, tree):
     ls = layer_states[layer]
     if len(ls.supports[tree]) == 0:
@@ -430,7 +443,7 @@ def collapse_type_b(layer_states, layer, rs, tree):
     # Refer to the root of tree as v
     v = assert_get(ls.supports[tree])
     # collapse_tree(tree,v)
-    super_v = collapse_tree(ls.vertices, v, v_tree, rs)
+    super_v = collapse_tree(ls.vertices, v, v_tree, rs, ls.embedding)
     rs.tree_has_collapsed[layer][tree] = True
 
     for u in v_tree:
@@ -442,20 +455,11 @@ def collapse_type_b(layer_states, layer, rs, tree):
     rs.vertex_to_super_out[v] = super_v
 
     # Add tree to the queue for this layer so it merges as a type B tree
-    rs.operations[layer].append((Ops.MERGE_TYPE_B, v))
+    rs.operations.push(layer, Ops.MERGE_TYPE_B, v)
 
 
+@traced
 def merge_type_a(layer_states, layer, rs, tree):
-    def succ(u):
-        c, start = ls_a.vertex_to_cycle_index[u]
-        path = ls_a.cycle_paths[c]
-        i = start
-        while True:
-            i = (i + 1) % len(path)
-            if len(ls_a.vertices[path[i]]) == 2 or i == start:
-                break
-        return path[i]
-
     ls = layer_states[layer]
     ls_a = layer_states[layer - 1]
     v_tree = ls.v_by_tree[tree]
@@ -528,9 +532,9 @@ def merge_type_a(layer_states, layer, rs, tree):
         # The tree we merged into is ready to collapse, so add it to the queue depending on its type
         # The successor tree may be either type A or type B.
         if len(ls.supports[next_t]) == 0:
-            rs.operations[layer].append((Ops.COLLAPSE_TYPE_A, next_t))
+            rs.operations.push(layer, Ops.COLLAPSE_TYPE_A, next_t)
         elif len(ls.supports[next_t]) == 1:
-            rs.operations[layer].append((Ops.COLLAPSE_TYPE_B, next_t))
+            rs.operations.push(layer, Ops.COLLAPSE_TYPE_B, next_t)
     # Otherwise, the successor tree is a type A tree that has collapsed but not yet merged.
     elif not succesor_tree in rs.tree_has_merged[layer]:
         # Merge super and the super vertex of which the successor tree is a part
@@ -539,13 +543,16 @@ def merge_type_a(layer_states, layer, rs, tree):
         rs.tree_to_super_out[layer][succesor_tree] = new_super
 
 
+@traced
 def merge_type_b(layer_states, layer, rs, v):
     def succ(a):
+        count("cycle_steps")
         x, index = ls.vertex_to_cycle_index[a]
         path = ls.cycle_paths[x]
         return path[(index + 1) % len(path)]
 
     def pred(a):
+        count("cycle_steps")
         x, index = ls.vertex_to_cycle_index[a]
         path = ls.cycle_paths[x]
         return path[(index - 1) % len(path)]
@@ -590,8 +597,7 @@ def merge_type_b(layer_states, layer, rs, v):
 
             if len(ls.supports[succesor_tree]
                    ) == 1 and len(ls.tree_to_nonconsec[succesor_tree]) <= 1:
-                rs.operations[layer].append((Ops.COLLAPSE_TYPE_B,
-                                             succesor_tree))
+                rs.operations.push(layer, Ops.COLLAPSE_TYPE_B, succesor_tree)
             return
 
         # Otherwise, if there are any trees on cycle left uncollapsed
@@ -627,133 +633,98 @@ def merge_type_b(layer_states, layer, rs, v):
         prep_cycle(layer_states, layer, rs, cycle)
 
 
-def collapse_tree(vertices, x, v_tree, rs):
-    # x will always be leaf vertex of tree
-    def deg(index):
-        return len([a for a in vertices[index] if a in v_tree])
+def collapse_tree(vertices, x, v_tree, rs, embedding):
+    # x will always be leaf vertex of tree. All of the state below is only
+    # kept for the vertices of the tree, so collapsing a tree costs time in
+    # the size of the tree rather than the size of the layer.
+    def tree_neighbours(v):
+        return [a for a in vertices[v] if a in v_tree]
 
     def index_vertex(v):
-        indx[v] = i
-        return i + 1
-
-    def set_super(v, new_super):
-        vertex_to_super_out[v] = new_super
+        indx[v] = len(indx) + 1
 
     def super_in_to_out(v):
         new_super = rs.super_in[v]
-        if new_super == frozenset([v]):
-            new_super = rs.super_append(new_super)
+        if new_super == SINGLE:
+            new_super = rs.super_append(v)
         vertex_to_super_out[v] = new_super
 
-    def angle_from_twelve(x, y):
-        return (pi / 2 - atan2(y, x) + 2 * pi) % (2 * pi)
-
-    def angle_delta(from_pos, to_pos):
-        # Our coordinate system has the bottom left as (0,height), so flip the y here
-        return angle_from_twelve(to_pos[0] - from_pos[0],
-                                 from_pos[1] - to_pos[1])
-
-    def make_angle_above(base, angle):
-        if angle < base:
-            return 2 * pi + angle
-        else:
-            return angle
-
-    def pick_angle_by_function(v, fun):
-        b = pred[v]
-        last_angle = angle_delta(vertices[v].pos, vertices[b].pos)
-        possible = [a for a in vertices[v] if a != b and a in v_tree]
-        angles_to = [
-            angle_delta(vertices[v].pos, vertices[a].pos) for a in possible
-        ]
-        corrected_angles = [
-            make_angle_above(last_angle, angle) for angle in angles_to
-        ]
-        chosen = possible[corrected_angles.index(fun(corrected_angles))]
-        return chosen
-
-    def left_child(v):
-        return pick_angle_by_function(v, max)
-
-    def right_child(v):
-        return pick_angle_by_function(v, min)
+    # The left child is the first tree neighbour counterclockwise from the
+    # predecessor and the right child is the first one clockwise from it.
+    def children(v, pred, neighbours):
+        possible = [a for a in neighbours if a != pred]
+        h = embedding.half_edge(v, pred)
+        l = embedding.target[embedding.rotate_counterclockwise(h, possible)]
+        r = embedding.target[embedding.rotate_clockwise(h, possible)]
+        return l, r
 
     indx = dict()
-    
     vertex_to_super_out = dict()
-    for v in vertices:
-        vertex_to_super_out[v] = 0
 
-    pred = dict()
-    # Refer to the vertex adjacent to x as v
-    v = assert_get([a for a in vertices[x] if a in v_tree])
-    pred[v] = x
-    i = 1
+    # Refer to the vertex adjacent to x as root
+    root = assert_get(tree_neighbours(x))
 
-    # If v is a leaf vertex of tree, tree is a tree consisting of two vertices.
-    if deg(v) == 1:
+    # If root is a leaf vertex of tree, tree is a tree consisting of two
+    # vertices.
+    if len(tree_neighbours(root)) == 1:
         # Assign an index to x
-        i = index_vertex(x)
-        # Assign an index to v
-        i = index_vertex(v)
+        index_vertex(x)
+        # Assign an index to root
+        index_vertex(root)
         super_in_to_out(x)
-        super_in_to_out(v)
-        # Return the super vertex of x and v
-        set_super(x, rs.circle_plus(vertex_to_super_out[x], vertex_to_super_out[v]))
+        super_in_to_out(root)
+        # Return the super vertex of x and root
         rs.update_indx(indx)
-        return vertex_to_super_out[x]
-
-    while v != x:
-        # If v is a leaf vertex, we have reached a leaf node, so it will be indexed and then we will retract.
-        if deg(v) == 1:
-            super_in_to_out(v)
-            # Assign an index to v
-            i = index_vertex(v)
-            # Set v to the predecessor of v
-            v = pred[v]
-            continue
-
-        # Refer to the left child of v as l
-        l = left_child(v)
-        # Refer to the right child of v as l
-        r = right_child(v)
-
-        # Both left and right trees must be visited before we can continue
-        # If l does not have an index
-        if not l in indx:
-            # Set the predecessor of l to v
-            pred[l] = v
-            # set v to l
-            v = l
-            continue
+        return rs.circle_plus(vertex_to_super_out[x],
+                              vertex_to_super_out[root])
+
+    # Walk the tree in post-order: the left subtree of a vertex, then its
+    # right subtree, then the vertex itself. Every vertex is on the stack
+    # twice, first to find its children and then (once they are collapsed)
+    # to collapse it with them.
+    stack = [(root, x, None)]
+    while len(stack) != 0:
+        v, pred, child_pair = stack.pop()
+        if child_pair == None:
+            neighbours = tree_neighbours(v)
+            # If v is a leaf vertex, it will be indexed and then we will
+            # retract.
+            if len(neighbours) == 1:
+                super_in_to_out(v)
+                index_vertex(v)
+                continue
 
-        # If r does not have an index
-        if not r in indx:
-            # Set the predecessor of r to v
-            pred[r] = v
-            # set v to r
-            v = r
+            l, r = children(v, pred, neighbours)
+            stack.append((v, pred, (l, r)))
+            if r != l:
+                stack.append((r, v, None))
+            stack.append((l, v, None))
             continue
 
-        # Note that at this point, l and r may be super vertices, but v is definitely not.
-        # As a result, v is ready to collapse.
+        # Note that at this point, l and r may be super vertices, but v is
+        # definitely not. As a result, v is ready to collapse.
+        l, r = child_pair
         super_in_to_out(v)
         # Collapse l and v into a super vertex
         Balpha = rs.circle_plus(vertex_to_super_out[v], vertex_to_super_out[l])
         # Collapse the result with r and store it under v
-        set_super(v, rs.circle_plus(Balpha, vertex_to_super_out[r]))
+        vertex_to_super_out[v] = rs.circle_plus(Balpha, vertex_to_super_out[r])
         # Assign an index to v
-        i = index_vertex(v)
-        # Refer to the predecessor of v as v
-        v = pred[v]
-
-    # v == x, so we just merge our traversal with our start
-    # Assign an index to x
-    i = index_vertex(x)
-    v = assert_get([a for a in vertices[x] if a in v_tree])
+        index_vertex(v)
+
+    # Every vertex but x is collapsed, so we just merge our traversal with
+    # our start. Assign an index to x
+    index_vertex(x)
     super_in_to_out(x)
     rs.update_indx(indx)
-    # Collapse x and v into a final super vertex
-    set_super(x, rs.circle_plus(vertex_to_super_out[x], vertex_to_super_out[v]))
-    # Return that final super vertex
-    return vertex_to_super_out[x]
+    # Collapse x and root into a final super vertex and return it
+    return rs.circle_plus(vertex_to_super_out[x], vertex_to_super_out[root])
+
+
+# operation_handlers maps every operation to the function that carries it out.
+operation_handlers = {
+    Ops.COLLAPSE_TYPE_A: collapse_type_a,
+    Ops.COLLAPSE_TYPE_B: collapse_type_b,
+    Ops.MERGE_TYPE_A: merge_type_a,
+    Ops.MERGE_TYPE_B: merge_type_b,
+}
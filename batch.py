@@ -0,0 +1,160 @@
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stdout
+from glob import glob, has_magic
+from time import perf_counter
+import argparse
+import json
+import os
+import sys
+
+from util.file_io import load_graph
+from algorithm.pipeline import reassemble
+from algorithm.reassemble import ValidationError, validation_levels
+
+# The batch runner reassembles many graph files in parallel, one process per
+# core, and writes one JSON record per graph (as a line of JSON) as soon as
+# that graph finishes. Nothing here touches the GUI.
+
+# The suffixes of graph files, the one read first when a graph is there in
+# more than one format coming first.
+graph_suffixes = (".graphb", ".graph", ".graph.gz", ".graph.xz")
+
+
+# graph_paths expands every path into the graph files it names, where each path
+# may be a graph file, a directory of graph files or a glob pattern. A path
+# that names no file is kept, so that it gets an unreadable record, and a
+# pattern that matches nothing is reported on standard error.
+def graph_paths(paths):
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            found.extend(directory_graphs(path))
+        elif os.path.exists(path) or not has_magic(path):
+            found.append(path)
+        else:
+            matches = sorted(glob(path))
+            if len(matches) == 0:
+                print("No graph files match", path, file=sys.stderr)
+            found.extend(matches)
+    return found
+
+
+# directory_graphs returns one file for every graph in directory. A graph
+# converted with main.py -convert is there both as x.graph and as x.graphb,
+# so only the first of graph_suffixes found for each name is kept.
+def directory_graphs(directory):
+    by_name = dict()
+    for name in os.listdir(directory):
+        for rank, suffix in enumerate(graph_suffixes):
+            if name.endswith(suffix):
+                graph_name = name[:-len(suffix)]
+                if not graph_name in by_name or rank < by_name[graph_name][0]:
+                    by_name[graph_name] = (rank, name)
+                break
+    return sorted(
+        os.path.join(directory, name) for _, name in by_name.values())
+
+
+# reassemble_file runs in a worker process, so it must only take and return
+# plain values that can be pickled. Anything the parser prints goes to standard
+# error, so that standard output only carries records.
+def reassemble_file(graph_path, check_valid=True):
+    with redirect_stdout(sys.stderr):
+        return reassemble_record(graph_path, check_valid)
+
+
+def new_record(graph_path, status="ok"):
+    return OrderedDict([
+        ("path", graph_path),
+        ("status", status),
+        ("vertices", None),
+        ("planarity", None),
+        ("max_alpha", None),
+        ("seconds", None),
+    ])
+
+
+def reassemble_record(graph_path, check_valid):
+    record = new_record(graph_path)
+    start = perf_counter()
+    try:
+        vertices = load_graph(graph_path)
+        if vertices == None:
+            record["status"] = "unreadable"
+            return record
+        record["vertices"] = len(vertices)
+        result = reassemble(vertices, check_valid)
+        if result == None:
+            record["status"] = "not a 1-3 graph"
+            return record
+        record["planarity"] = result.planarity
+        record["max_alpha"] = result.max_alpha
+    except ValidationError:
+        record["status"] = "invalid"
+    except OSError:
+        record["status"] = "unreadable"
+    except Exception as error:
+        record["status"] = "error: " + repr(error)
+    finally:
+        record["seconds"] = perf_counter() - start
+    return record
+
+
+# run_batch reassembles every graph in paths on workers processes (all of the
+# cores by default) and calls report with each record as it completes, so the
+# records are in order of completion rather than of paths. If a worker fails
+# outside of reassemble_record, or dies and breaks the pool, every graph it
+# takes down still gets an error record, and the rest of the batch goes on.
+def run_batch(paths, report, workers=None, check_valid=True):
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(reassemble_file, graph_path, check_valid): graph_path
+            for graph_path in paths
+        }
+        for future in as_completed(futures):
+            try:
+                record = future.result()
+            except Exception as error:
+                record = new_record(futures[future],
+                                    "error: " + repr(error))
+            report(record)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Reassemble many graphs in parallel.")
+    parser.add_argument("paths", nargs="+",
+                        help="graph files, directories of them or glob "
+                        "patterns")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="number of worker processes")
+    parser.add_argument("--validate", default="full",
+                        choices=validation_levels,
+                        help="how thoroughly to check every reassembly")
+    parser.add_argument("--output",
+                        help="write the records to this file instead of "
+                        "standard output")
+    args = parser.parse_args()
+
+    paths = graph_paths(args.paths)
+    if len(paths) == 0:
+        print("No graph files found.", file=sys.stderr)
+        return
+
+    output = sys.stdout
+    if args.output:
+        output = open(args.output, "w")
+    try:
+        def report(record):
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+
+        run_batch(paths, report, args.workers, args.validate)
+    finally:
+        if args.output:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
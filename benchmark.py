@@ -0,0 +1,235 @@
+from collections import OrderedDict
+from time import perf_counter
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+
+from util.file_io import load_graph, write_graph_text
+from util.graph_generator import families, generate
+from util.graph_spec import check_one_three, crop_graph
+from util.half_edge import HalfEdgeGraph
+from util.reassembly_state import ReassemblyState
+from algorithm.preprocess import build_layers, link_layers
+from algorithm.reassemble import run_operations, validate
+from util import memory, profiling
+
+# The benchmark runs every phase of a reassembly separately on generated graphs
+# of increasing size, and reports the wall time, the time per vertex and
+# (optionally) the peak traced memory of each phase. If the implementation is
+# linear, the time per vertex of every phase stays flat as the size grows.
+
+default_sizes = [10**2, 10**3, 10**4, 10**5, 10**6]
+
+phases = [
+    "load", "check_one_three", "crop_graph", "embedding", "start_phase",
+    "set_path_above", "algorithmKS", "validate"
+]
+
+
+class PhaseTimer(object):
+    def __init__(self, measure_memory):
+        self.measure_memory = measure_memory
+        self.seconds = OrderedDict()
+        self.peak_bytes = OrderedDict()
+
+    def run(self, name, fun, *args):
+        if self.measure_memory:
+            tracemalloc.reset_peak()
+        start = perf_counter()
+        result = fun(*args)
+        self.seconds[name] = perf_counter() - start
+        if self.measure_memory:
+            self.peak_bytes[name] = tracemalloc.get_traced_memory()[1]
+        return result
+
+
+# run_phases reassembles the graph stored at graph_path, timing each phase.
+# Validation is skipped for graphs with more than validate_limit vertices (if
+# it is set).
+def run_phases(graph_path, measure_memory=False, validate_limit=None):
+    timer = PhaseTimer(measure_memory)
+    # The memory report may already be tracing, and needs it to go on.
+    own_tracing = measure_memory and not tracemalloc.is_tracing()
+    if own_tracing:
+        tracemalloc.start()
+    try:
+        graph = timer.run("load", load_graph, graph_path)
+        assert timer.run("check_one_three", check_one_three, graph)
+        timer.run("crop_graph", crop_graph, graph)
+        embedding = timer.run("embedding", HalfEdgeGraph, graph)
+        planarity, layer_states = timer.run("start_phase", build_layers,
+                                            graph, embedding, "faces")
+        timer.run("set_path_above", link_layers, layer_states)
+        rs = ReassemblyState(graph, planarity)
+        timer.run("algorithmKS", run_operations, layer_states, rs, planarity)
+        if validate_limit == None or len(graph) <= validate_limit:
+            timer.run("validate", validate, layer_states, rs)
+    finally:
+        if own_tracing:
+            tracemalloc.stop()
+    return len(graph), planarity, timer
+
+
+def run_benchmark(family_names, sizes, measure_memory=False,
+                  validate_limit=None, report=print):
+    records = []
+    directory = tempfile.mkdtemp(prefix="ks_benchmark_")
+    try:
+        for name in family_names:
+            for size in sizes:
+                graph_path = os.path.join(directory, name + ".graph")
+                write_graph_text(generate(name, size), graph_path)
+                profiling.reset_counters()
+                memory.reset()
+                n, planarity, timer = run_phases(graph_path, measure_memory,
+                                                 validate_limit)
+                for phase in phases:
+                    if phase not in timer.seconds:
+                        continue
+                    record = OrderedDict([
+                        ("family", name),
+                        ("vertices", n),
+                        ("planarity", planarity),
+                        ("phase", phase),
+                        ("seconds", timer.seconds[phase]),
+                        ("us_per_vertex", 1e6 * timer.seconds[phase] / n),
+                        ("peak_bytes", timer.peak_bytes.get(phase)),
+                    ])
+                    records.append(record)
+                    report(format_record(record))
+                if profiling.counting:
+                    records.append(OrderedDict([
+                        ("family", name),
+                        ("vertices", n),
+                        ("planarity", planarity),
+                        ("counters", OrderedDict(
+                            (counter, total) for counter, total, _
+                            in profiling.counter_report(n))),
+                    ]))
+                    report(profiling.format_counter_report(n))
+                if memory.enabled:
+                    report(memory.format_report(n))
+    finally:
+        shutil.rmtree(directory)
+    return records
+
+
+# The modules that a batch worker or a command line run imports first, and the
+# modules that must not be among the ones they pull in, because they need a
+# display or are slow to import.
+startup_modules = ["main", "batch", "algorithm.pipeline", "util.file_io"]
+gui_modules = ["tkinter", "graphics.lib", "graphics.draw", "pyscreenshot"]
+
+
+# import_time imports module in a fresh interpreter with -X importtime and
+# returns the cumulative import time of module in seconds and the GUI modules
+# it imported along the way.
+def import_time(module):
+    root = os.path.dirname(os.path.abspath(__file__))
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import " + module],
+        cwd=root, stderr=subprocess.PIPE, universal_newlines=True)
+    seconds = None
+    imported_gui = []
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        # import time: self [us] | cumulative | imported package
+        fields = line[len("import time:"):].split("|")
+        name = fields[2].strip()
+        if name in gui_modules:
+            imported_gui.append(name)
+        if name == module:
+            seconds = int(fields[1]) / 1e6
+    if process.returncode != 0:
+        seconds = None
+    return seconds, imported_gui
+
+
+def run_import_benchmark(modules=startup_modules, report=print):
+    records = []
+    for module in modules:
+        seconds, imported_gui = import_time(module)
+        record = OrderedDict([
+            ("module", module),
+            ("seconds", seconds),
+            ("gui_modules", imported_gui),
+        ])
+        records.append(record)
+        if seconds == None:
+            line = "{:<18} failed to import".format(module)
+        else:
+            line = "{:<18} {:>10.4f} s".format(module, seconds)
+        if len(imported_gui) != 0:
+            line += "  imports " + ", ".join(imported_gui)
+        report(line)
+    return records
+
+
+def format_record(record):
+    line = "{:<18} {:>9} {:>4}  {:<16} {:>10.4f} s {:>9.3f} us/vertex".format(
+        record["family"], record["vertices"], record["planarity"],
+        record["phase"], record["seconds"], record["us_per_vertex"])
+    if record["peak_bytes"] != None:
+        line += " {:>10.1f} MB peak".format(record["peak_bytes"] / 2**20)
+    return line
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Time each phase of the KS Algorithm on generated graphs.")
+    parser.add_argument("--families", nargs="+", default=list(families),
+                        choices=list(families))
+    parser.add_argument("--sizes", nargs="+", type=int, default=default_sizes)
+    parser.add_argument("--memory", action="store_true",
+                        help="also record the peak traced memory of every "
+                        "phase (this slows every phase down)")
+    parser.add_argument("--validate-limit", type=int, default=None,
+                        help="skip validate above this many vertices")
+    parser.add_argument("--json", help="write every record to this file")
+    parser.add_argument("--trace",
+                        help="record spans and write them to this file as a "
+                        "Chrome trace, then print a summary of them")
+    parser.add_argument("--counters", action="store_true",
+                        help="also count the elementary steps of every run, "
+                        "per vertex")
+    parser.add_argument("--memory-report", action="store_true",
+                        help="also show the memory in use after every phase "
+                        "and the structures it belongs to (slow)")
+    parser.add_argument("--imports", action="store_true",
+                        help="only time how long the entry points take to "
+                        "import")
+    args = parser.parse_args()
+
+    if args.imports:
+        records = run_import_benchmark()
+        if args.json:
+            with open(args.json, "w") as json_file:
+                json.dump(records, json_file, indent=1)
+        return
+
+    if args.trace:
+        profiling.enable()
+    if args.counters:
+        profiling.enable_counters()
+    if args.memory_report:
+        memory.enable()
+    print("{:<18} {:>9} {:>4}  {:<16} {:>12} {:>19}".format(
+        "family", "vertices", "k", "phase", "time", "time per vertex"))
+    records = run_benchmark(args.families, args.sizes, args.memory,
+                            args.validate_limit)
+    if args.trace:
+        profiling.write_chrome_trace(args.trace)
+        print(profiling.format_summary())
+    if args.json:
+        with open(args.json, "w") as json_file:
+            json.dump(records, json_file, indent=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,6 @@
 from graphics.lib import *
 from math import hypot
 from random import randrange
-import pyscreenshot as ImageGrab
-
-#Returns true if the edge from u to v is directed
-def is_directed(dir_G, u, v):
-    return not u in dir_G[v]
-
 
 def simple(vertices,graph_name="graph"):
     x_size, y_size = 0, 0
@@ -46,6 +40,10 @@ def graph(rs, autoscroll, update_time, close_on_finish, reset_index, graph_name)
         for v in range(len(rs.vertices)):
             rs.indx[v] = v
         
+    # Every rs.Blst lookup rebuilds that step from the merge tree, so build
+    # each step once here rather than on every key press.
+    steps = [rs.Blst[i] for i in range(len(rs.Blst))]
+
     x_size, y_size = 0, 0
     for vertex in rs.vertices:
         x_size = max(vertex.pos[0], x_size)
@@ -147,12 +145,12 @@ def graph(rs, autoscroll, update_time, close_on_finish, reset_index, graph_name)
         " is the number of spliced edges\nin current (bolded) reassembly   ")
     alpha_descr.draw(window)
 
-    texts = [None] * len(rs.Blst)
-    max_current_history = [0] * len(rs.Blst)
+    texts = [None] * len(steps)
+    max_current_history = [0] * len(steps)
     max_current_red = 0
     max_current_set = set([])
 
-    max_total_history = [(0, set())] * len(rs.Blst)
+    max_total_history = [(0, set())] * len(steps)
     max_total_red = 0
 
     reassembly_width = 100
@@ -164,7 +162,7 @@ def graph(rs, autoscroll, update_time, close_on_finish, reset_index, graph_name)
         update(update_time)
         key = "Right" if autoscroll else window.getKey()
         if key == "Right":
-            # # # grab fullscreen
+            # # # grab fullscreen (with import pyscreenshot as ImageGrab)
             # im = ImageGrab.grab(bbox=(x1,y1,x2,y2))
 
             # # # save image file
@@ -172,19 +170,19 @@ def graph(rs, autoscroll, update_time, close_on_finish, reset_index, graph_name)
 
             # show image in a window
             # im.show()
-            if index > len(rs.Blst):  #Done!
-                if index + 1 == len(rs.Blst):
+            if index > len(steps):  #Done!
+                if index + 1 == len(steps):
                     print("DONE")
                 if close_on_finish:
                     break
                 else:
                     pass
-            elif index < len(rs.Blst):
+            elif index < len(steps):
                 for up_to in range(index):  #Move everything down
                     texts[up_to].move(0, y_spacing_text)
                     texts[up_to].setStyle("normal")
 
-                current = rs.Blst[index]
+                current = steps[index]
                 n_str = "{"
                 num_comma = 0
                 for x_vert in current:  #This could be combined with the loop below, but it is separated for readability
@@ -200,7 +198,8 @@ def graph(rs, autoscroll, update_time, close_on_finish, reset_index, graph_name)
                 # t.draw(window) NOT DRAWING
                 texts[index] = t 
 
-                current_red = 0
+                # The number of red (spliced) edges was counted while reassembling
+                current_red = rs.alpha[index]
                 for circle in nodes.values():
                     circle.setWidth(1)
                 for x_vert in current:  #For every vertex in our current reassembly
@@ -212,11 +211,11 @@ def graph(rs, autoscroll, update_time, close_on_finish, reset_index, graph_name)
                             if x_vert > y_vert:  #We only want to connect them if we are above them, and they are also reassembled
                                 line = lines[(x_vert, y_vert)]
                                 line.setDash(())
-                                if is_directed(
-                                        rs.dir_G, x_vert, y_vert
+                                if rs.is_directed(
+                                        x_vert, y_vert
                                 ):  #Check how the directed graph orders us
                                     line.setArrow("last")
-                                elif is_directed(rs.dir_G, y_vert, x_vert):
+                                elif rs.is_directed(y_vert, x_vert):
                                     line.setArrow("first")
                                 line.setFill("black")
                         else:  #Unconnected edge!
@@ -224,7 +223,6 @@ def graph(rs, autoscroll, update_time, close_on_finish, reset_index, graph_name)
                                 x_vert, y_vert))]
                             line.setDash((10, 5))
                             line.setFill("Red")
-                            current_red += 1
                 if current_red > max_current_red or max_current_set.issubset(
                         current):
                     #If our current reassembly is a superset of the previous reassembly, we need to update our current red
@@ -234,14 +232,14 @@ def graph(rs, autoscroll, update_time, close_on_finish, reset_index, graph_name)
                 if current_red > max_total_red:  #The same is not necessary for the max red
                     max_total_red = current_red
                     max_alpha_num.setText(current_red)
-                current_index = min(len(rs.Blst) - 1, index + 1)
+                current_index = min(len(steps) - 1, index + 1)
                 max_total_history[current_index] = (max_total_red,
                                                     max_current_set)
                 max_current_history[current_index] = max_current_red
             index += 1
         elif key == "Left":
             index -= 1
-            if index == len(rs.Blst):
+            if index == len(steps):
                 pass
             elif index < 0:
                 index = 0
@@ -257,14 +255,14 @@ def graph(rs, autoscroll, update_time, close_on_finish, reset_index, graph_name)
                     if Blst_index < index:
                         texts[Blst_index].move(0, -y_spacing_text)
                         reassembled = reassembled.union(
-                            rs.Blst[Blst_index])
+                            steps[Blst_index])
                         if Blst_index == index - 1:
                             texts[Blst_index].setStyle("bold")
                     else:
                         texts[Blst_index].undraw()
                         texts[Blst_index] = None
 
-                current = rs.Blst[index]
+                current = steps[index]
                 for circle in nodes.values():
                     circle.setWidth(1)
                 for x_vert in current:
@@ -274,7 +272,7 @@ def graph(rs, autoscroll, update_time, close_on_finish, reset_index, graph_name)
                             for Blst_index in range(
                                     index
                             ):  #Check to make sure if we have been previously connected
-                                check_Blst = rs.Blst[Blst_index]
+                                check_Blst = steps[Blst_index]
                                 if y_vert in check_Blst and x_vert in check_Blst:
                                     paired_up = True
                                     break
@@ -1,4 +1,7 @@
 from test import test_all, run_test, run_file
+from util.graph_binary import convert_graphs
+from util.graph_generator import families, generate
+from util.file_io import write_graph
 from sys import argv
 
 def handle_argument(argument):
@@ -14,10 +17,22 @@ def handle_argument(argument):
             print("-file takes as input the name of the example to run. Please run with 'python main.py -file PATH/TO/FILE.graph'")
             return
         run_file(argv[2])
+    elif argument == "-convert":
+        if len(argv) < 3:
+            print("-convert takes as input the .graph files (or directories of them) to convert. Please run with 'python main.py -convert PATH/TO/FILE.graph'")
+            return
+        for binary_path in convert_graphs(argv[2:]):
+            print("Wrote", binary_path)
+    elif argument == "-generate":
+        if len(argv) != 5 or argv[2] not in families:
+            print("-generate takes as input a family (one of " + ", ".join(families) + "), a number of vertices and the file to write. Please run with 'python main.py -generate nested_squares 100000 PATH/TO/FILE.graph'")
+            return
+        print("Wrote", write_graph(generate(argv[2], int(argv[3])), argv[4]))
     else:
         print("Unrecognized command.")
 
-if len(argv) == 1:
-    print("Did not receive a commandline argument. Running all tests by default.")
-    test_all()
-handle_argument(argv[1])
+if __name__ == "__main__":
+    if len(argv) == 1:
+        print("Did not receive a commandline argument. Running all tests by default.")
+        test_all()
+    handle_argument(argv[1])
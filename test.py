@@ -8,7 +8,7 @@ def run_file(path_to_file):
             return
         path_to_file += ".graph"
     vertices = read_graph(path_to_file)
-    graph_name = path_to_file.rsplit("/")[-1][:-6]
+    graph_name = path_to_file.rsplit("/")[-1].rsplit(".", 1)[0]
     start_reassembly(vertices,graph_name)
 
 def run_test(graph_name):
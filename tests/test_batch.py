@@ -0,0 +1,136 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import batch
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+paths = [
+    os.path.join(root, "test_cases", name + ".graph")
+    for name in ("example_1", "many_trees", "nested_tree")
+]
+failing_path = paths[1]
+real_reassemble_record = batch.reassemble_record
+
+
+# The workers are forked from the test, so they see these in place of
+# batch.reassemble_record.
+def raise_on_failing_path(graph_path, check_valid):
+    if graph_path == failing_path:
+        raise RuntimeError("broken worker")
+    return real_reassemble_record(graph_path, check_valid)
+
+
+def exit_on_failing_path(graph_path, check_valid):
+    if graph_path == failing_path:
+        os._exit(1)
+    return real_reassemble_record(graph_path, check_valid)
+
+
+@unittest.skipUnless(multiprocessing.get_start_method() == "fork",
+                     "the workers must be forked to see the patch")
+class RunBatchTest(unittest.TestCase):
+    def run_batch(self, workers=2):
+        records = []
+        batch.run_batch(paths, records.append, workers)
+        return dict((record["path"], record) for record in records)
+
+    def test_failing_graph_gets_an_error_record(self):
+        with mock.patch("batch.reassemble_record", raise_on_failing_path):
+            records = self.run_batch()
+        self.assertEqual(sorted(records), sorted(paths))
+        self.assertEqual(records[failing_path]["status"],
+                         "error: RuntimeError('broken worker')")
+        for path in paths:
+            if path != failing_path:
+                self.assertEqual(records[path]["status"], "ok")
+                self.assertEqual(records[path]["planarity"], 2)
+
+    def test_dead_worker_gets_an_error_record(self):
+        with mock.patch("batch.reassemble_record", exit_on_failing_path):
+            records = self.run_batch(workers=1)
+        self.assertEqual(sorted(records), sorted(paths))
+        self.assertTrue(
+            records[failing_path]["status"].startswith(
+                "error: BrokenProcessPool"))
+
+
+class GraphPathsTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def test_directory_runs_every_graph_once(self):
+        for name in ("x.graph", "x.graphb", "y.graph", "y.graph.gz",
+                     "z.graph.xz", "notes.txt"):
+            open(self.path(name), "w").close()
+        self.assertEqual(batch.graph_paths([self.directory]), [
+            self.path("x.graphb"),
+            self.path("y.graph"),
+            self.path("z.graph.xz"),
+        ])
+
+    def test_missing_file_is_unreadable(self):
+        missing = self.path("missing.graph")
+        self.assertEqual(batch.graph_paths([missing]), [missing])
+        self.assertEqual(batch.reassemble_file(missing)["status"],
+                         "unreadable")
+
+
+# A four cycle with a leaf on every vertex has every vertex on the outer face,
+# which the KS Algorithm asserts against whether or not it validates.
+outerplanar_graph = """POSITIONS
+10 10
+20 10
+20 20
+10 20
+0 0
+30 0
+30 30
+0 30
+EDGES
+0 1
+1 2
+2 3
+3 0
+0 4
+1 5
+2 6
+3 7
+END
+"""
+
+
+class ReassembleRecordTest(unittest.TestCase):
+    def test_only_validation_is_invalid(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, "outerplanar.graph")
+            with open(path, "w") as graph_file:
+                graph_file.write(outerplanar_graph)
+            for level in ("off", "full"):
+                self.assertEqual(
+                    batch.reassemble_record(path, level)["status"],
+                    "error: AssertionError()", level)
+        finally:
+            shutil.rmtree(directory)
+
+        with mock.patch("algorithm.reassemble.check_reassembly",
+                        side_effect=AssertionError):
+            self.assertEqual(
+                batch.reassemble_record(paths[0], "full")["status"],
+                "invalid")
+            self.assertEqual(
+                batch.reassemble_record(paths[0], "off")["status"], "ok")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+
+from algorithm.pipeline import reassemble
+from util import profiling
+from util.graph_generator import families, generate
+
+
+# The counters tally the steps of a reassembly, so for a linear time
+# reassembly every counter divided by the number of vertices stays the same as
+# graphs grow. A step that is repeated for every vertex of a cycle (rather
+# than once) shows up as a counter growing with the size of the graph.
+class CountersTest(unittest.TestCase):
+    sizes = (500, 4000)
+
+    def setUp(self):
+        profiling.reset_counters()
+        profiling.enable_counters()
+
+    def tearDown(self):
+        profiling.disable_counters()
+        profiling.reset_counters()
+
+    def per_vertex(self, family, n):
+        profiling.reset_counters()
+        graph = generate(family, n)
+        reassemble(graph.to_vertices(), "structural")
+        return dict((name, per_vertex) for name, _, per_vertex in
+                    profiling.counter_report(len(graph)))
+
+    def test_counters_per_vertex_stay_flat(self):
+        for family in families:
+            small, large = [self.per_vertex(family, n) for n in self.sizes]
+            self.assertEqual(sorted(small), sorted(large), family)
+            self.assertIn("cycle_steps", large, family)
+            for name in small:
+                self.assertLess(large[name], 1.1 * small[name] + 0.05,
+                                "%s %s" % (family, name))
+
+
+if __name__ == "__main__":
+    unittest.main()
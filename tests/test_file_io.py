@@ -0,0 +1,159 @@
+from contextlib import redirect_stdout
+import io
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+from util.file_io import (load_graph, parse_graph, parse_graph_fast,
+                          read_graph, write_graph)
+from util.graph_generator import generate
+from util.half_edge import HalfEdgeGraph
+from util import profiling
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class ParseGraphTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, text, name="graph.graph"):
+        path = os.path.join(self.directory, name)
+        with open(path, "w", newline="") as graph_file:
+            graph_file.write(text)
+        return path
+
+    # parse_graph prints what is wrong with a file, and may also raise.
+    def parse_quietly(self, path):
+        with redirect_stdout(io.StringIO()) as output:
+            try:
+                vertices = parse_graph(path)
+            except (ValueError, IndexError):
+                vertices = None
+        return vertices, output.getvalue()
+
+    def test_offsetting_lines_fall_back(self):
+        # One value too many on one line and one too few on the next make the
+        # right number of values in total.
+        path = self.write("POSITIONS\n1 0 2\n0\n1 1\nEDGES\n0 1\nEND\n")
+        self.assertEqual(parse_graph_fast(path), None)
+        with redirect_stdout(io.StringIO()) as output:
+            self.assertEqual(read_graph(path), None)
+        self.assertEqual(output.getvalue(),
+                         "['1', '0', '2'] not inputted as tuple\n")
+
+    def test_malformed_lines_fall_back(self):
+        for section in ["1 0\n\n2 0", "1 0\r\n2 0", "1 0 2\n0", "1\n0 2 0"]:
+            path = self.write("POSITIONS\n" + section + "\nEDGES\n0 1\nEND\n")
+            self.assertEqual(parse_graph_fast(path), None, repr(section))
+
+    # Every mutation of a valid file that parse_graph rejects is rejected by
+    # parse_graph_fast too, and every one they both accept is the same graph.
+    def test_mutations_agree_with_parse_graph(self):
+        with open(os.path.join(root, "test_cases", "example_1.graph")) as f:
+            original = f.read()
+        rng = random.Random(7)
+        for case in range(400):
+            text = list(original)
+            for _ in range(rng.randint(1, 3)):
+                i = rng.randrange(len(text))
+                mutation = rng.randrange(3)
+                if mutation == 0:
+                    del text[i]
+                elif mutation == 1:
+                    text.insert(i, rng.choice(" \n\r\t0123456789.-"))
+                else:
+                    text[i] = rng.choice(" \n0123456789")
+            path = self.write("".join(text))
+
+            vertices, _ = self.parse_quietly(path)
+            try:
+                graph = parse_graph_fast(path)
+            except (ValueError, IndexError):
+                graph = None
+            if vertices == None:
+                self.assertEqual(graph, None, "".join(text))
+            elif graph != None:
+                self.assertEqual(len(graph), len(vertices))
+                for v in range(len(graph)):
+                    self.assertEqual(graph.pos(v), vertices[v].pos)
+                    self.assertEqual(sorted(graph[v]),
+                                     sorted(vertices[v].edges))
+
+
+
+class WriteGraphTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.graph = generate("many_trees", 60)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_writes_to_the_given_path(self):
+        os.mkdir(os.path.join(self.directory, "out.v2"))
+        for name in ("a.graph", "out.v2/b.graph.gz", "out.v2/c.graph.xz",
+                     "out.v2/d.graphb"):
+            path = os.path.join(self.directory, name)
+            self.assertEqual(write_graph(self.graph, path), path)
+            graph = load_graph(path)
+            self.assertEqual(len(graph), len(self.graph), name)
+        self.assertEqual(sorted(os.listdir(self.directory)),
+                         ["a.graph", "out.v2"])
+
+    def test_relative_path(self):
+        cwd = os.getcwd()
+        os.chdir(self.directory)
+        try:
+            self.assertEqual(write_graph(self.graph, "./a.graph"), "./a.graph")
+        finally:
+            os.chdir(cwd)
+        self.assertTrue(
+            os.path.exists(os.path.join(self.directory, "a.graph")))
+
+    def test_graph_extension_is_added(self):
+        for name, written in (("out.v2/b", "out.v2/b.graph"),
+                              ("out.v2/c.gz", "out.v2/c.graph.gz")):
+            os.makedirs(os.path.join(self.directory, "out.v2"),
+                        exist_ok=True)
+            path = os.path.join(self.directory, name)
+            self.assertEqual(write_graph(self.graph, path),
+                             os.path.join(self.directory, written))
+
+    def test_empty_path_raises(self):
+        with self.assertRaises(ValueError):
+            write_graph(self.graph, "")
+
+
+    # A .graphb file read with read_graph keeps its stored clockwise order,
+    # so building the embedding computes no angles.
+    def test_read_graph_keeps_the_rotation(self):
+        path = os.path.join(self.directory, "a.graphb")
+        write_graph(self.graph, path)
+        vertices = read_graph(path)
+        profiling.reset_counters()
+        profiling.enable_counters()
+        try:
+            embedding = HalfEdgeGraph(vertices)
+            self.assertEqual(profiling.counters["angle_evaluations"], 0)
+            self.assertEqual(list(embedding.target),
+                             list(HalfEdgeGraph(self.graph).target))
+
+            # Once the edges change the stored order is not used.
+            u = vertices[0][0]
+            vertices[0].remove_edge(u)
+            vertices[u].remove_edge(0)
+            HalfEdgeGraph(vertices)
+            self.assertGreater(profiling.counters["angle_evaluations"], 0)
+        finally:
+            profiling.disable_counters()
+            profiling.reset_counters()
+
+
+if __name__ == "__main__":
+    unittest.main()
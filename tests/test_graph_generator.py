@@ -0,0 +1,55 @@
+import unittest
+
+from algorithm.pipeline import run_ks
+from util.graph_generator import families, generate, is_plane, nested_rings
+from util.graph_spec import check_one_three
+
+
+# support_counts returns how many trees of the graph have each number of
+# supports, over every layer.
+def support_counts(graph):
+    planarity, layer_states, rs = run_ks(graph.to_vertices(), True)
+    counts = {}
+    for ls in layer_states:
+        for t in range(len(ls.trees)):
+            supports = ls.support_count_original[t]
+            counts[supports] = counts.get(supports, 0) + 1
+    return counts
+
+
+class GraphGeneratorTest(unittest.TestCase):
+    def test_families_are_plane(self):
+        for family in families:
+            for n in (60, 500):
+                graph = generate(family, n)
+                self.assertTrue(is_plane(graph), family)
+                self.assertTrue(check_one_three(graph), family)
+
+    def test_many_trees_has_both_tree_types(self):
+        counts = support_counts(generate("many_trees", 600))
+        self.assertGreater(counts.get(0, 0), 0)
+        self.assertGreater(counts.get(1, 0), 0)
+
+    def test_paired_nested_tree_has_two_supports(self):
+        counts = support_counts(generate("paired_nested_tree", 600))
+        self.assertEqual(counts.get(2, 0), 1)
+        self.assertGreater(counts.get(1, 0), 0)
+
+    # support_counts reassembles the graph, so this also checks that the
+    # reassembly takes every combination, at more than one size.
+    def test_knobs_combine(self):
+        for n in (800, 3000):
+            graph = nested_rings(n, depth=4, fan_out=4, shape="diamond",
+                                 unsupported=0.3, inner_rings=2)
+            self.assertTrue(is_plane(graph))
+            counts = support_counts(graph)
+            self.assertGreater(counts.get(0, 0), 0, n)
+            self.assertEqual(counts.get(2, 0), 1, n)
+
+            graph = nested_rings(n // 2, depth=2, fan_out=4,
+                                 unsupported=0.34, inner_rings=2)
+            self.assertEqual(support_counts(graph).get(2, 0), 1, n)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+from array import array
+
+
+# CSRGraph is a compact, read-only version of a list of Vertex objects. The
+# neighbours of v are neighbours[offsets[v]:offsets[v + 1]] and the position of
+# v is (positions[2 * v], positions[2 * v + 1]). Rather than one object, one
+# tuple and one list per vertex, the whole graph is held in three flat arrays.
+#
+# Indexing a CSRGraph returns a CSRVertex, which behaves like a Vertex (pos,
+# len, iteration, indexing, membership), so code written against a list of
+# Vertex objects can read from a CSRGraph unchanged.
+class CSRGraph(object):
+    def __init__(self, positions, offsets, neighbours, rotation=None):
+        self.positions = positions
+        self.offsets = offsets
+        self.neighbours = neighbours
+        # The RotationSystem of the graph, if it is already known.
+        self.rotation = rotation
+
+    @staticmethod
+    def from_vertices(vertices):
+        positions = array('d', [0.0] * (2 * len(vertices)))
+        offsets = array('l', [0] * (len(vertices) + 1))
+        neighbours = array('l')
+        for v, vertex in enumerate(vertices):
+            positions[2 * v] = vertex.pos[0]
+            positions[2 * v + 1] = vertex.pos[1]
+            neighbours.extend(vertex.edges)
+            offsets[v + 1] = len(neighbours)
+        return CSRGraph(positions, offsets, neighbours)
+
+    # from_edges builds the graph from a flat array of positions and a flat
+    # array of edge endpoints (u0, v0, u1, v1, ...). The neighbours of every
+    # vertex are kept in the order the edges are listed, like read_graph does.
+    @staticmethod
+    def from_edges(positions, endpoints):
+        n = len(positions) // 2
+        offsets = array('l', [0] * (n + 1))
+        for v in endpoints:
+            offsets[v + 1] += 1
+        for v in range(n):
+            offsets[v + 1] += offsets[v]
+
+        neighbours = array('l', [0] * len(endpoints))
+        fill = array('l', offsets[:n])
+        for i in range(0, len(endpoints), 2):
+            u, v = endpoints[i], endpoints[i + 1]
+            neighbours[fill[u]] = v
+            fill[u] += 1
+            neighbours[fill[v]] = u
+            fill[v] += 1
+        return CSRGraph(positions, offsets, neighbours)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, v):
+        return CSRVertex(self, v)
+
+    def __iter__(self):
+        for v in range(len(self)):
+            yield CSRVertex(self, v)
+
+    def degree(self, v):
+        return self.offsets[v + 1] - self.offsets[v]
+
+    def neighbours_of(self, v):
+        return self.neighbours[self.offsets[v]:self.offsets[v + 1]]
+
+    def pos(self, v):
+        return (self.positions[2 * v], self.positions[2 * v + 1])
+
+    # edges yields every edge once, as (v, u) with v < u.
+    def edges(self):
+        for v in range(len(self)):
+            for i in range(self.offsets[v], self.offsets[v + 1]):
+                u = self.neighbours[i]
+                if v < u:
+                    yield v, u
+
+    def edge_count(self):
+        return len(self.neighbours) // 2
+
+    def to_vertices(self):
+        from util.graph_spec import Vertex
+        vertices = [0] * len(self)
+        for v in range(len(self)):
+            vertices[v] = Vertex(self.pos(v))
+            vertices[v].edges = list(self.neighbours_of(v))
+        return vertices
+
+
+class CSRVertex(object):
+    __slots__ = ("graph", "v")
+
+    def __init__(self, graph, v):
+        self.graph = graph
+        self.v = v
+
+    @property
+    def pos(self):
+        return self.graph.pos(self.v)
+
+    @pos.setter
+    def pos(self, value):
+        self.graph.positions[2 * self.v] = value[0]
+        self.graph.positions[2 * self.v + 1] = value[1]
+
+    @property
+    def edges(self):
+        return list(self.graph.neighbours_of(self.v))
+
+    def __str__(self):
+        return str(self.pos) + str(self.edges)
+
+    def __len__(self):
+        return self.graph.degree(self.v)
+
+    def __getitem__(self, key):
+        return self.edges[key]
+
+    def __iter__(self):
+        graph = self.graph
+        for i in range(graph.offsets[self.v], graph.offsets[self.v + 1]):
+            yield graph.neighbours[i]
+
+    def __contains__(self, item):
+        graph = self.graph
+        for i in range(graph.offsets[self.v], graph.offsets[self.v + 1]):
+            if graph.neighbours[i] == item:
+                return True
+        return False
+
+    def circle_point(self, sizeMod, radius, x_offset):
+        from graphics.lib import Point
+        x, y = self.pos
+        return Point(x * sizeMod + radius + x_offset, y * sizeMod + radius)
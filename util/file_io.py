@@ -1,18 +1,148 @@
-import tkinter as tk
-from tkinter import filedialog
-from util.graph_spec import Vertex
+from util.graph_spec import Vertex, VertexList
+from util.csr_graph import CSRGraph
+from util.graph_binary import read_graph_binary, write_graph_binary, is_binary_path
+from util.memory import checkpointed
+from util.profiling import traced
+from array import array
+import gzip
+import lzma
+import mmap
 import os
+import re
 
-file_types = [("graph files","*.graph"),("all files","*.*")]
+file_types = [("graph files","*.graph"),("binary graph files","*.graphb"),("compressed graph files","*.graph.gz *.graph.xz"),("all files","*.*")]
 
+# Text graphs may be compressed, which is recognized by the extension.
+compressors = {".gz": gzip, ".xz": lzma}
+write_buffer_size = 1 << 20
+
+
+# ask_file_path is only used when no path is given, so tkinter is never
+# imported when graphs are read or written programmatically.
+def ask_file_path(save):
+    import tkinter as tk
+    from tkinter import filedialog
+    root = tk.Tk()
+    root.withdraw()
+    if save:
+        return filedialog.asksaveasfilename(initialdir = os.getcwd(),title = "Select file",filetypes = file_types)
+    return filedialog.askopenfilename(initialdir = os.getcwd(),title = "Select file",filetypes = file_types)
+
+
+def compressor_of(file_path):
+    return compressors.get(os.path.splitext(file_path)[1])
+
+
+def open_graph_file(file_path, mode):
+    compressor = compressor_of(file_path)
+    if compressor != None:
+        return compressor.open(file_path, mode + "t")
+    if mode == "w":
+        return open(file_path, mode, buffering=write_buffer_size)
+    return open(file_path, mode)
+
+
+@traced
+@checkpointed("read_graph", "graph")
 def read_graph(file_path=None):
     if file_path == None:
-        root = tk.Tk()
-        root.withdraw()
-        file_path =  filedialog.askopenfilename(initialdir = os.getcwd(),title = "Select file",filetypes = file_types)
+        file_path = ask_file_path(False)
+
+    if is_binary_path(file_path):
+        graph = read_graph_binary(file_path)
+        if graph == None:
+            return None
+        # Keep the stored clockwise order for HalfEdgeGraph
+        vertices = VertexList(graph.to_vertices())
+        vertices.rotation = graph.rotation
+        return vertices
+
+    graph = parse_graph_fast(file_path)
+    if graph != None:
+        return graph.to_vertices()
+    return parse_graph(file_path)
+
+
+# load_graph reads a .graph file straight into a CSRGraph, without building a
+# Vertex for every vertex.
+@traced(name="read_graph")
+@checkpointed("read_graph", "graph")
+def load_graph(file_path):
+    if is_binary_path(file_path):
+        return read_graph_binary(file_path)
+
+    graph = parse_graph_fast(file_path)
+    if graph != None:
+        return graph
+    vertices = parse_graph(file_path)
+    if vertices == None:
+        return None
+    return CSRGraph.from_vertices(vertices)
+
+
+# parse_graph_fast memory maps the file and converts each of the POSITIONS and
+# EDGES sections with a single split, instead of going line by line. It
+# returns None for anything it does not recognize, so that parse_graph can
+# report what is wrong with the file. Compressed files cannot be mapped, so
+# they are decompressed into memory instead.
+def parse_graph_fast(file_path):
+    compressor = compressor_of(file_path)
+    if compressor != None:
+        with compressor.open(file_path, "rb") as graph_file:
+            return parse_graph_bytes(graph_file.read())
 
-    graph_file = ""
-    graph_file = open(file_path, "r").read()
+    with open(file_path, "rb") as graph_file:
+        try:
+            data = mmap.mmap(graph_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped
+            return None
+    with data:
+        return parse_graph_bytes(data)
+
+
+# pair_lines matches a section of lines of two values separated by spaces or
+# tabs, with no empty lines, or an empty section.
+pair_lines = re.compile(rb"(?:\S+[ \t]+\S+\n)*\S+[ \t]+\S+|")
+
+
+def parse_graph_bytes(data):
+    header = b"POSITIONS\n"
+    if data[:len(header)] != header:
+        return None
+    edges_start = data.find(b"\nEDGES\n", len(header) - 1)
+    if edges_start == -1:
+        return None
+    end = data.find(b"\nEND", edges_start + 6)
+    if end == -1 or data[end + 4:end + 5] not in (b"", b"\n"):
+        return None
+
+    positions_section = data[len(header):edges_start]
+    edges_section = data[edges_start + 7:end]
+
+    # Every line must hold exactly one pair. Anything else (including empty
+    # lines and carriage returns) is left to parse_graph to report.
+    if pair_lines.fullmatch(positions_section) == None:
+        return None
+    if pair_lines.fullmatch(edges_section) == None:
+        return None
+    positions_tokens = positions_section.split()
+    edges_tokens = edges_section.split()
+
+    try:
+        positions = array('d', map(float, positions_tokens))
+        endpoints = array('l', map(int, edges_tokens))
+    except ValueError:
+        return None
+    n = len(positions) // 2
+    if len(endpoints) != 0 and (min(endpoints) < 0 or max(endpoints) >= n):
+        return None
+    return CSRGraph.from_edges(positions, endpoints)
+
+
+def parse_graph(file_path):
+    with open_graph_file(file_path, "r") as graph_file:
+        graph_file = graph_file.read()
     
     split_input = graph_file.split("\n")
     if split_input[0] != "POSITIONS":
@@ -48,30 +178,48 @@ def read_graph(file_path=None):
 
     return vertices
 
+# write_graph writes vertices (a list of Vertex objects or a CSRGraph) to
+# file_path and returns the path it wrote. The format follows the extension:
+# .graphb is binary, .graph.gz and .graph.xz are compressed text, and .graph
+# is text. A path without a graph extension gets .graph added.
 def write_graph(vertices,file_path=None):
     if file_path == None:
-        root = tk.Tk()
-        root.withdraw()
-        file_path =  filedialog.asksaveasfilename(initialdir = os.getcwd(),title = "Select file",filetypes = file_types)
+        file_path = ask_file_path(True)
+        # The dialog returns no path when it is cancelled
+        if not file_path:
+            return None
+    if file_path == "":
+        raise ValueError("No file to write the graph to")
 
-    split_name = file_path.split(".")
-    if split_name[0] == "":
-        return
+    final_path_name = graph_file_path(file_path)
+    if is_binary_path(final_path_name):
+        write_graph_binary(vertices, final_path_name)
+    else:
+        write_graph_text(vertices, final_path_name)
+    return final_path_name
 
-    final_path_name = split_name[0] + ".graph"
-    graph_file = open(final_path_name, "w+")
-    
-    positions = ""
-    edges = ""
-    for v, vertex in enumerate(vertices):
-        positions += str(vertex.pos[0]) + " " + str(vertex.pos[1]) + "\n"
-        for u in vertex:
-            if v < u:
-             edges += str(v) + " " + str(u) + "\n" 
-
-    graph_file.write("POSITIONS\n")
-    graph_file.write(positions)
-    graph_file.write("EDGES\n")
-    graph_file.write(edges)
-    graph_file.write("END")
-    graph_file.close()
\ No newline at end of file
+
+def graph_file_path(file_path):
+    root, extension = os.path.splitext(file_path)
+    if extension in (".graph", ".graphb"):
+        return file_path
+    if extension in compressors:
+        if os.path.splitext(root)[1] == ".graph":
+            return file_path
+        return root + ".graph" + extension
+    return file_path + ".graph"
+
+
+def write_graph_text(vertices, final_path_name):
+    # Every line goes straight to a buffered (or compressing) writer, so the
+    # file is never held in memory as a whole.
+    with open_graph_file(final_path_name, "w") as graph_file:
+        graph_file.write("POSITIONS\n")
+        for vertex in vertices:
+            graph_file.write(str(vertex.pos[0]) + " " + str(vertex.pos[1]) + "\n")
+        graph_file.write("EDGES\n")
+        for v, vertex in enumerate(vertices):
+            for u in vertex:
+                if v < u:
+                    graph_file.write(str(v) + " " + str(u) + "\n")
+        graph_file.write("END")
@@ -0,0 +1,133 @@
+from array import array
+from util.csr_graph import CSRGraph
+from util.rotation_system import RotationSystem
+import mmap
+import struct
+import sys
+import os
+
+# A .graphb file is a little-endian binary version of a .graph file that can
+# be mapped straight into memory:
+#
+#   header      magic, version, flags, vertex count n, neighbour count m
+#   positions   float64[2n]   x and y of every vertex
+#   offsets     int64[n + 1]  neighbours of v are neighbours[offsets[v]:offsets[v + 1]]
+#   neighbours  int64[m]
+#   clockwise   int64[m]      (if FLAG_ROTATION) the clockwise order of every
+#                             vertex's neighbours, sharing offsets
+#
+# The header is 32 bytes and every section is made of 8 byte values, so all of
+# them stay aligned and can be viewed without copying.
+MAGIC = b"KSGRAPHB"
+VERSION = 1
+FLAG_ROTATION = 1
+header_format = "<8sIIQQ"
+header_size = struct.calcsize(header_format)
+
+
+def write_graph_binary(vertices, file_path, with_rotation=True):
+    if not isinstance(vertices, CSRGraph):
+        vertices = CSRGraph.from_vertices(vertices)
+    n = len(vertices)
+    m = len(vertices.neighbours)
+
+    flags = 0
+    if with_rotation:
+        flags |= FLAG_ROTATION
+        rotation = vertices.rotation
+        if rotation is None:
+            rotation = RotationSystem(vertices)
+
+    with open(file_path, "wb") as graph_file:
+        graph_file.write(struct.pack(header_format, MAGIC, VERSION, flags, n, m))
+        write_section(graph_file, 'd', vertices.positions)
+        write_section(graph_file, 'q', vertices.offsets)
+        write_section(graph_file, 'q', vertices.neighbours)
+        if with_rotation:
+            write_section(graph_file, 'q', rotation.clockwise)
+
+
+def write_section(graph_file, typecode, values):
+    section = array(typecode, values)
+    if sys.byteorder != "little":
+        section.byteswap()
+    section.tofile(graph_file)
+
+
+# read_graph_binary returns a CSRGraph whose arrays are views into a private
+# mapping of the file, so nothing is parsed or copied until a page is touched.
+# Writes (such as crop_graph moving the positions) never reach the file.
+def read_graph_binary(file_path):
+    with open(file_path, "rb") as graph_file:
+        try:
+            data = mmap.mmap(graph_file.fileno(), 0, access=mmap.ACCESS_COPY)
+        except ValueError:
+            print("No header in file")
+            return None
+
+    if len(data) < header_size:
+        print("No header in file")
+        return None
+    magic, version, flags, n, m = struct.unpack_from(header_format, data)
+    if magic != MAGIC:
+        print("File is not a .graphb file")
+        return None
+    if version != VERSION:
+        print("Unsupported .graphb version " + str(version))
+        return None
+
+    sections = [('d', 2 * n), ('q', n + 1), ('q', m)]
+    if flags & FLAG_ROTATION:
+        sections.append(('q', m))
+    if len(data) < header_size + 8 * sum(size for _, size in sections):
+        print("File is truncated")
+        return None
+
+    views = []
+    start = header_size
+    for typecode, size in sections:
+        views.append(read_section(data, start, typecode, size))
+        start += 8 * size
+
+    graph = CSRGraph(views[0], views[1], views[2])
+    if flags & FLAG_ROTATION:
+        graph.rotation = RotationSystem.from_arrays(views[1], views[3])
+    return graph
+
+
+def read_section(data, start, typecode, size):
+    raw = memoryview(data)[start:start + 8 * size]
+    if sys.byteorder == "little":
+        return raw.cast(typecode)
+    # Big-endian machines cannot use the file as is.
+    section = array(typecode)
+    section.frombytes(raw)
+    section.byteswap()
+    return section
+
+
+def is_binary_path(file_path):
+    return file_path.endswith(".graphb")
+
+
+# convert_graphs writes a .graphb file next to every .graph file in paths,
+# where each path may be a file or a directory of .graph files.
+def convert_graphs(paths, with_rotation=True):
+    from util.file_io import load_graph
+    converted = []
+    for path in paths:
+        if os.path.isdir(path):
+            files = sorted(
+                os.path.join(path, name) for name in os.listdir(path)
+                if name.endswith(".graph"))
+        else:
+            files = [path]
+        for file_path in files:
+            graph = load_graph(file_path)
+            if graph == None:
+                print("Could not convert", file_path)
+                continue
+            binary_path = os.path.splitext(file_path)[0] + ".graphb"
+            write_graph_binary(graph, binary_path, with_rotation)
+            converted.append(binary_path)
+    return converted
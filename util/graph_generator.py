@@ -0,0 +1,262 @@
+from array import array
+from collections import OrderedDict
+from math import cos, sin, pi
+from util.csr_graph import CSRGraph
+from util.half_edge import HalfEdgeGraph
+
+# Generates large three-regular planar straight line graphs, in the style of
+# the hand drawn graphs in test_cases/.
+#
+# Every generated graph is a set of depth nested rings (cycles) around a common
+# center. Every ring vertex has exactly one edge leaving its ring, either up to
+# the ring enclosing it or down to the ring inside it. The vertices of a ring
+# that go down are split into groups of fan_out consecutive vertices, and every
+# group is joined by a binary tree whose root has a single edge to the ring
+# below. With fan_out 1 the trees are single edges (spokes), as in
+# nested_squares, and with a larger fan_out there are many trees between every
+# pair of rings, as in many_trees. Every ring adds one E-outerplanarity level.
+#
+# The edge to the ring below makes every such tree a Type B tree with a single
+# support. A fraction unsupported of the trees (which needs fan_out >= 3) have
+# no support at all and are Type A trees: the leaves are split in two halves,
+# each joined by a binary tree, and the two roots are joined to each other.
+# With inner_rings 2 the innermost ring is split into two rings side by side,
+# and the tree between them has a support on each, as in paired_nested_tree.
+# The reassembly does not handle a third ring joined to them the same way, nor
+# Type A trees in the band around the two rings, so that band only has Type B
+# trees.
+#
+# Every vertex is placed on a ray from the center, and moving down a ring (or
+# down a tree) always moves strictly closer to the center along every ray, so
+# edges never cross.
+
+# Radius of each ring compared to the ring enclosing it. It is small enough
+# that a ring drawn as a square rotated by any angle still fits inside the one
+# above it.
+ring_ratio = 0.6
+center = 32000.0
+outer_radius = 20000.0
+
+
+def shape_circle(angle):
+    return 1.0
+
+
+def shape_square(angle):
+    return 1.0 / max(abs(sin(angle)), abs(cos(angle)))
+
+
+def shape_diamond(angle):
+    return 1.0 / (abs(sin(angle)) + abs(cos(angle)))
+
+
+shapes = {
+    "circle": shape_circle,
+    "square": shape_square,
+    "diamond": shape_diamond,
+}
+
+
+class RingBuilder(object):
+    def __init__(self, shape, twist):
+        self.shape = shapes[shape]
+        self.twist = twist
+        self.positions = array('d')
+        self.endpoints = array('l')
+
+    # add_vertex places a vertex on the ray at angle, at the given distance
+    # (measured in rings, so 1.5 is halfway between ring 1 and ring 2).
+    def add_vertex(self, angle, ring):
+        low = int(ring)
+        fraction = ring - low
+        radius = outer_radius * ring_ratio**ring
+        scale = (1 - fraction) * self.shape(angle - low * self.twist) + \
+            fraction * self.shape(angle - (low + 1) * self.twist)
+        self.positions.append(center + radius * scale * sin(angle))
+        self.positions.append(center - radius * scale * cos(angle))
+        return len(self.positions) // 2 - 1
+
+    def add_edge(self, v, u):
+        self.endpoints.append(v)
+        self.endpoints.append(u)
+
+    # add_tree joins leaves (a list of (vertex, angle) on ring) with a binary
+    # tree hanging below the ring and returns (root, angle). Only the root is
+    # left with a free edge. The tree takes up span of the distance to the next
+    # ring, and a negative span makes it hang up from the ring instead.
+    def add_tree(self, leaves, ring, span=1.0):
+        height = tree_height(len(leaves))
+        return self.add_subtree(leaves, ring, height, span)
+
+    def add_subtree(self, leaves, ring, height, span=1.0):
+        if len(leaves) == 1:
+            return leaves[0]
+        half = len(leaves) // 2
+        left_height = tree_height(half)
+        right_height = tree_height(len(leaves) - half)
+        left, left_angle = self.add_subtree(leaves[:half], ring, height, span)
+        right, right_angle = self.add_subtree(leaves[half:], ring, height,
+                                              span)
+        angle = (left_angle + right_angle) / 2
+        level = max(left_height, right_height) + 1
+        v = self.add_vertex(angle, ring + span * level / (height + 1.0))
+        self.add_edge(v, left)
+        self.add_edge(v, right)
+        return v, angle
+
+    # add_unsupported_tree joins leaves with a tree that has no free edge.
+    def add_unsupported_tree(self, leaves, ring):
+        half = len(leaves) // 2
+        height = tree_height(len(leaves) - half)
+        left, _ = self.add_subtree(leaves[:half], ring, height)
+        right, _ = self.add_subtree(leaves[half:], ring, height)
+        self.add_edge(left, right)
+
+    def graph(self):
+        return CSRGraph.from_edges(self.positions, self.endpoints)
+
+
+def tree_height(leaf_count):
+    height = 0
+    while (1 << height) < leaf_count:
+        height += 1
+    return height
+
+
+# nested_rings returns a CSRGraph with roughly n vertices. depth is the
+# number of rings (and so the E-outerplanarity), fan_out is the number of ring
+# vertices joined by each tree (its leaf fan-out), unsupported is the fraction
+# of trees that are Type A, inner_rings is the number of rings (1 or 2) the
+# innermost ring is split into, shape is one of shapes, and twist rotates the
+# shape of every ring by that many radians more than the ring enclosing it.
+def nested_rings(n, depth=4, fan_out=1, shape="circle", twist=0.0,
+                 min_trees=8, unsupported=0.0, inner_rings=1):
+    assert depth >= 2 and fan_out >= 1 and inner_rings in (1, 2)
+    assert 0 <= unsupported < 1 and (unsupported == 0 or fan_out >= 3)
+    # Every band between two rings has the same number of trees. Each tree has
+    # fan_out leaves on the ring above it, and fan_out vertices going down on
+    # the ring below it (unless it is the innermost ring). A Type B tree also
+    # has fan_out - 1 inner vertices and one vertex on the ring below, and a
+    # Type A tree fan_out - 2 inner vertices. That is 2 * fan_out vertices for
+    # every Type B tree and band, and two fewer for a Type A tree.
+    tree_size = 2 * fan_out - 2 * unsupported
+    trees = max(min_trees, int(n / (tree_size * (depth - 1))))
+    down_count = trees * fan_out
+    # Spread the Type A trees evenly over every band.
+    supported = [g for g in range(trees)
+                 if int((g + 1) * unsupported) == int(g * unsupported)]
+    # The trees of the innermost band that sit between two inner rings. There
+    # is no such tree before the first ring, so the face between the rings
+    # stays joined to the band.
+    between = set(supported[b * len(supported) // inner_rings]
+                  for b in range(1, inner_rings))
+    assert len(supported) >= 3 * inner_rings
+
+    builder = RingBuilder(shape, twist)
+
+    # The outermost ring goes down everywhere.
+    ring = []
+    down = []
+    for j in range(down_count):
+        angle = 2 * pi * (j + 0.5) / down_count
+        v = builder.add_vertex(angle, 0)
+        ring.append(v)
+        down.append((v, angle))
+    close_ring(builder, ring)
+
+    supported = set(supported)
+    for i in range(1, depth):
+        innermost = i == depth - 1
+        if innermost and inner_rings == 2:
+            supported = set(range(trees))
+        ring = []
+        # The innermost ring is split into inner_rings rings.
+        inner = []
+        next_down = []
+        for g in range(trees):
+            group = down[g * fan_out:(g + 1) * fan_out]
+            if not g in supported:
+                builder.add_unsupported_tree(group, i - 1)
+                # The ring below still goes down under the tree.
+                if not innermost:
+                    for _, angle in group:
+                        v = builder.add_vertex(angle, i)
+                        ring.append(v)
+                        next_down.append((v, angle))
+                continue
+            if innermost and g in between:
+                # The tree leads to an inner vertex with one edge to the end
+                # of a ring and one to the start of the next one, so it has
+                # two supports.
+                root, root_angle = builder.add_tree(group, i - 1, 0.5)
+                step = pi / (4 * down_count)
+                ends = [(builder.add_vertex(root_angle - step, i),
+                         root_angle - step),
+                        (builder.add_vertex(root_angle + step, i),
+                         root_angle + step)]
+                top, _ = builder.add_tree(ends, i, -0.5)
+                builder.add_edge(root, top)
+                ring.append(ends[0][0])
+                inner.append(ring)
+                ring = [ends[1][0]]
+                continue
+
+            root, root_angle = builder.add_tree(group, i - 1)
+            up = builder.add_vertex(root_angle, i)
+            builder.add_edge(root, up)
+            if innermost:
+                ring.append(up)
+                continue
+
+            # The next groups going down sit below this tree, on either side
+            # of the vertex going up.
+            if fan_out == 1:
+                angles = [root_angle + pi / down_count]
+            else:
+                angles = [angle for _, angle in group]
+            placed_up = False
+            for angle in angles:
+                if angle > root_angle and not placed_up:
+                    ring.append(up)
+                    placed_up = True
+                v = builder.add_vertex(angle, i)
+                ring.append(v)
+                next_down.append((v, angle))
+            if not placed_up:
+                ring.append(up)
+        for inner_ring in inner + [ring]:
+            close_ring(builder, inner_ring)
+        down = next_down
+
+    return builder.graph()
+
+
+def close_ring(builder, ring):
+    for j in range(len(ring)):
+        builder.add_edge(ring[j], ring[(j + 1) % len(ring)])
+
+
+# The families below are modelled on the test case of the same name, with the
+# default knobs chosen to match its shape. Every knob can be overridden.
+families = OrderedDict([
+    ("nested_squares", dict(depth=4, shape="square")),
+    ("nested_diamond", dict(depth=4, shape="diamond")),
+    ("rotating_squares", dict(depth=3, shape="square", twist=pi / 8)),
+    ("many_trees", dict(depth=2, fan_out=4, unsupported=0.5)),
+    ("paired_nested_tree", dict(depth=3, fan_out=2, shape="square",
+                                inner_rings=2)),
+])
+
+
+def generate(family, n, **knobs):
+    options = dict(families[family])
+    options.update(knobs)
+    return nested_rings(n, **options)
+
+
+# is_plane checks that the clockwise order of the edges around every vertex
+# describes a planar embedding of a connected graph (V - E + F = 2).
+def is_plane(vertices):
+    embedding = HalfEdgeGraph(vertices)
+    edges = len(embedding.target) // 2
+    return len(vertices) - edges + embedding.face_count() == 2
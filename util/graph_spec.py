@@ -1,7 +1,3 @@
-from math import atan2, pi
-from graphics.lib import Point
-
-
 class Vertex:
     def __init__(self, pos):
         self.pos = pos
@@ -40,10 +36,38 @@ class Vertex:
         self.edges.remove(remove_to)
 
     def circle_point(self, sizeMod, radius, x_offset):
+        # graphics.lib creates a Tk root when it is imported, so only pull it
+        # in once something is actually being drawn.
+        from graphics.lib import Point
         x, y = self.pos
         return Point(x * sizeMod + radius + x_offset, y * sizeMod + radius)
 
 
+# VertexList is a list of Vertex objects that also carries the rotation system
+# (the clockwise order of the edges around every vertex) stored with the graph
+# it was read from, if there was one, so that it is not computed again.
+class VertexList(list):
+    rotation = None
+
+
+# It may be possible to remove space surrounding the graph in order to have it
+# fit the screen more easily.
+def crop_graph(vertices):
+    min_x, min_y = 2**16, 2**16
+    max_x, max_y = 0, 0
+    for vertex in vertices:
+        min_x = min(vertex.pos[0], min_x)
+        min_y = min(vertex.pos[1], min_y)
+        max_x = max(vertex.pos[0], max_x)
+        max_y = max(vertex.pos[1], max_y)
+
+    max_x = max_x - min_x
+    max_y = max_y - min_y
+
+    for v, vertex in enumerate(vertices):
+        vertex.pos = (vertex.pos[0] - min_x, vertex.pos[1] - min_y)
+
+
 # to_consider is a set or a list of ints, not of vertices
 def upper_left_most(vertices, to_consider=None, only_deg_1=True):
     to_return = -1
@@ -80,73 +104,6 @@ def upper_left_most(vertices, to_consider=None, only_deg_1=True):
     return to_return
 
 
-def outer_face(vertices, start):
-    def angle_from_twelve(x, y):
-        return (pi / 2 - atan2(y, x) + 2 * pi) % (2 * pi)
-
-    def angle_delta(from_pos, to_pos):
-        # Our coordinate system has the bottom left as (0,height), so flip the y here
-        return angle_from_twelve(to_pos[0] - from_pos[0],
-                                 from_pos[1] - to_pos[1])
-
-    def make_angle_above(base, angle):
-        if angle < base:
-            return 2 * pi + angle
-        else:
-            return angle
-
-    path = []
-    unique_path = []
-    # Initialize every vertex such that all vertices are unmarked
-    visited = set()
-    edges_traversed = set()
-    total_edges_traversed = []
-
-    last_angle = 0
-    last = -1
-    current = start
-
-    x = 0
-    #While the graph has edges left unmarked, starting at the upper leftmost unmarked vertex, traverse the graph by taking the next clockwise edge at each vertex encountered, marking each time a vertex is visited, until the traversal returns to the original vertex.
-    while True:
-        x += 1
-        # This should never be raised, but I have this here so we know.
-        # This signals an error with the embedding, or the start position
-        assert x < len(vertices) * 2
-
-        # Starting at the upper leftmost unmarked vertex,
-        # traverse the graph by taking the next clockwise edge at each vertex encountered.
-
-        path.append(current)
-        if not current in visited:
-            unique_path.append(current)
-        visited.add(current)
-
-        possible = [v for v in vertices[current].edges if not v == last]
-        if len(possible) == 0:
-            next = last
-        else:
-            angles_to = [
-                angle_delta(vertices[current].pos, vertices[v].pos)
-                for v in possible
-            ]
-            corrected_angles = [
-                make_angle_above(last_angle, angle) for angle in angles_to
-            ]
-            next = possible[corrected_angles.index(min(corrected_angles))]
-
-        edge = (min(current, next), max(current, next))
-        edges_traversed.add(edge)
-        total_edges_traversed.append(edge)
-        last_angle = angle_delta(vertices[next].pos, vertices[current].pos)
-        last = current
-        current = next
-
-        if current == start:
-            break
-    return path, edges_traversed, total_edges_traversed
-
-
 def check_one_three(vertices):
     isValid = True
     for v, vertex in enumerate(vertices):
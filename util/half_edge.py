@@ -0,0 +1,127 @@
+from array import array
+from util.rotation_system import RotationSystem
+
+
+# HalfEdgeGraph is a doubly-connected edge list for the straight line
+# embedding of the graph. Every edge {u, v} is split into the half-edges u->v
+# and v->u, which are each other's twin. The half-edges leaving a vertex are
+# stored next to each other in clockwise order, so that rotating around a
+# vertex, walking a face, or stepping to the next clockwise edge is a single
+# array lookup.
+#
+# next[h] is the half-edge that follows h along its face, which is the first
+# half-edge clockwise after twin[h] around the target of h. This is the same
+# "take the next clockwise edge" rule used to walk the outer face, so faces
+# are exactly the orbits of next.
+class HalfEdgeGraph(object):
+    def __init__(self, vertices, rotation=None):
+        if rotation is None:
+            # A CSRGraph or VertexList read from a .graphb file may already
+            # carry its rotation system. A VertexList can have been edited
+            # since, so its order is only used if the edges are the same.
+            rotation = getattr(vertices, "rotation", None)
+            if isinstance(vertices, list) and rotation is not None and \
+                    not rotation.matches(vertices):
+                rotation = None
+        if rotation is None:
+            rotation = RotationSystem(vertices)
+        n = len(vertices)
+
+        # The half-edges leaving v are offsets[v] to offsets[v + 1] - 1
+        self.offsets = array('l', [0] * (n + 1))
+        for v in range(n):
+            self.offsets[v + 1] = self.offsets[v] + len(rotation[v])
+        m = self.offsets[n]
+
+        self.origin = array('l', [0] * m)
+        self.target = array('l', [0] * m)
+        self.rot_next = array('l', [0] * m)
+        self.rot_prev = array('l', [0] * m)
+        for v in range(n):
+            start = self.offsets[v]
+            degree = len(rotation[v])
+            for k, u in enumerate(rotation[v]):
+                h = start + k
+                self.origin[h] = v
+                self.target[h] = u
+                self.rot_next[h] = start + (k + 1) % degree
+                self.rot_prev[h] = start + (k - 1) % degree
+
+        self.twin = array('l', [0] * m)
+        for h in range(m):
+            self.twin[h] = self.half_edge(self.target[h], self.origin[h])
+
+        self.next = array('l', [0] * m)
+        for h in range(m):
+            self.next[h] = self.rot_next[self.twin[h]]
+
+        # Label every half-edge with the face to its left (in walking order).
+        self.face = array('l', [-1] * m)
+        self.face_start = array('l')
+        for h in range(m):
+            if self.face[h] != -1:
+                continue
+            f = len(self.face_start)
+            self.face_start.append(h)
+            current = h
+            while self.face[current] == -1:
+                self.face[current] = f
+                current = self.next[current]
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def face_count(self):
+        return len(self.face_start)
+
+    def out_edges(self, v):
+        return range(self.offsets[v], self.offsets[v + 1])
+
+    def half_edge(self, u, v):
+        for h in range(self.offsets[u], self.offsets[u + 1]):
+            if self.target[h] == v:
+                return h
+        return -1
+
+    # face_edges yields the half-edges of face f in walking order.
+    def face_edges(self, f):
+        start = self.face_start[f]
+        h = start
+        while True:
+            yield h
+            h = self.next[h]
+            if h == start:
+                return
+
+    # The helpers below navigate a subgraph of the embedding, where present is
+    # a container of the neighbours that are still connected to the vertex
+    # being rotated around. Skipped half-edges are simply stepped over, since
+    # removing edges does not change the clockwise order of those remaining.
+
+    # first_out returns the first half-edge clockwise from twelve o'clock
+    # leaving v whose target is in present.
+    def first_out(self, v, present):
+        for h in range(self.offsets[v], self.offsets[v + 1]):
+            if self.target[h] in present:
+                return h
+        return -1
+
+    # rotate_clockwise returns the first half-edge clockwise after h around
+    # the origin of h whose target is in present. If there is no other, h
+    # itself is returned.
+    def rotate_clockwise(self, h, present):
+        current = self.rot_next[h]
+        while current != h and not self.target[current] in present:
+            current = self.rot_next[current]
+        return current
+
+    def rotate_counterclockwise(self, h, present):
+        current = self.rot_prev[h]
+        while current != h and not self.target[current] in present:
+            current = self.rot_prev[current]
+        return current
+
+    # turn returns the half-edge that follows h on the face of the subgraph,
+    # where present are the neighbours of the target of h.
+    def turn(self, h, present):
+        return self.rotate_clockwise(self.twin[h], present)
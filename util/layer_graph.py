@@ -0,0 +1,73 @@
+# LayerGraph is the graph of a single E-outerplanarity layer. Rather than
+# holding its own copy of every vertex, it is an overlay on the shared graph:
+# positions come from base, neighbours come from the half-edge embedding, and
+# the layer is just a mask selecting the half-edges whose level equals layer.
+# Indexing it returns a LayerVertex, which behaves like a Vertex holding only
+# the edges of this layer.
+class LayerGraph(object):
+    def __init__(self, base, embedding, level, layer, edges):
+        self.base = base
+        self.embedding = embedding
+        self.level = level
+        self.layer = layer
+        self.members = set()
+        for v, u in edges:
+            self.members.add(v)
+            self.members.add(u)
+
+    def __len__(self):
+        return len(self.members)
+
+    def __iter__(self):
+        return iter(self.members)
+
+    def __contains__(self, v):
+        return v in self.members
+
+    def __getitem__(self, v):
+        return LayerVertex(self, v)
+
+    def neighbours(self, v):
+        embedding = self.embedding
+        return [
+            embedding.target[h] for h in embedding.out_edges(v)
+            if self.level[h] == self.layer
+        ]
+
+    def degree(self, v):
+        count = 0
+        for h in self.embedding.out_edges(v):
+            if self.level[h] == self.layer:
+                count += 1
+        return count
+
+
+class LayerVertex(object):
+    __slots__ = ("graph", "v")
+
+    def __init__(self, graph, v):
+        self.graph = graph
+        self.v = v
+
+    @property
+    def pos(self):
+        return self.graph.base[self.v].pos
+
+    @property
+    def edges(self):
+        return self.graph.neighbours(self.v)
+
+    def __str__(self):
+        return str(self.pos) + str(self.edges)
+
+    def __len__(self):
+        return self.graph.degree(self.v)
+
+    def __getitem__(self, key):
+        return self.edges[key]
+
+    def __iter__(self):
+        return iter(self.graph.neighbours(self.v))
+
+    def __contains__(self, item):
+        return item in self.graph.neighbours(self.v)
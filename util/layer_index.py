@@ -0,0 +1,234 @@
+from array import array
+from util import profiling
+from util.profiling import counted
+
+# The indexes of a LayerState are keyed by vertex, tree or cycle ids, which
+# are dense integers, so rather than dicts they are int32 arrays with MISSING
+# where a key has no value. That takes 4 bytes per key instead of a hash
+# table entry and a boxed int per value. An array only covers the range of
+# keys of its own layer, so all the layers together take memory in the size
+# of the graph. The classes below keep the dict interface the reassembly
+# uses (indexing, in, get and assignment), and indexing a missing key still
+# raises KeyError.
+
+MISSING = -1
+# An array is used as long as at least one in dense_factor of the keys in its
+# range is used, which keeps it smaller than the dict it replaces.
+dense_factor = 8
+
+
+# KeyRange describes the keys an index will hold: count keys, all between
+# low and high inclusive.
+class KeyRange(object):
+    def __init__(self, low, high, count):
+        self.low = low
+        self.high = high
+        self.count = count
+
+    @staticmethod
+    def of(keys):
+        keys = list(keys)
+        if len(keys) == 0:
+            return KeyRange(0, -1, 0)
+        return KeyRange(min(keys), max(keys), len(keys))
+
+    def size(self):
+        return self.high - self.low + 1
+
+    def is_dense(self):
+        return self.size() <= dense_factor * max(self.count, 1)
+
+
+# IntMap maps the integers of a KeyRange to non-negative integers.
+class IntMap(object):
+    __slots__ = ("low", "values")
+
+    def __init__(self, keys):
+        self.low = keys.low
+        self.values = array('i', [MISSING]) * keys.size()
+
+    def __getitem__(self, key):
+        i = key - self.low
+        if i < 0 or i >= len(self.values) or self.values[i] == MISSING:
+            raise KeyError(key)
+        return self.values[i]
+
+    def __setitem__(self, key, value):
+        i = key - self.low
+        if i < 0:
+            raise IndexError("key below the range of the index")
+        self.values[i] = value
+
+    def __contains__(self, key):
+        i = key - self.low
+        return 0 <= i < len(self.values) and self.values[i] != MISSING
+
+    def get(self, key, default=None):
+        i = key - self.low
+        if i < 0 or i >= len(self.values) or self.values[i] == MISSING:
+            return default
+        return self.values[i]
+
+    def __len__(self):
+        return len(self.values) - self.values.count(MISSING)
+
+    def __iter__(self):
+        for i, value in enumerate(self.values):
+            if value != MISSING:
+                yield self.low + i
+
+    def items(self):
+        for i, value in enumerate(self.values):
+            if value != MISSING:
+                yield self.low + i, value
+
+
+# PairMap maps the integers of a KeyRange to pairs of non-negative integers,
+# such as a cycle and an index on it, kept in two arrays.
+class PairMap(object):
+    __slots__ = ("low", "first", "second")
+
+    def __init__(self, keys):
+        self.low = keys.low
+        self.first = array('i', [MISSING]) * keys.size()
+        self.second = array('i', [MISSING]) * keys.size()
+
+    def __getitem__(self, key):
+        i = key - self.low
+        if i < 0 or i >= len(self.first) or self.first[i] == MISSING:
+            raise KeyError(key)
+        return self.first[i], self.second[i]
+
+    def __setitem__(self, key, pair):
+        i = key - self.low
+        if i < 0:
+            raise IndexError("key below the range of the index")
+        self.first[i], self.second[i] = pair
+
+    def __contains__(self, key):
+        i = key - self.low
+        return 0 <= i < len(self.first) and self.first[i] != MISSING
+
+    def get(self, key, default=None):
+        i = key - self.low
+        if i < 0 or i >= len(self.first) or self.first[i] == MISSING:
+            return default
+        return self.first[i], self.second[i]
+
+    def __len__(self):
+        return len(self.first) - self.first.count(MISSING)
+
+    def __iter__(self):
+        for i, first in enumerate(self.first):
+            if first != MISSING:
+                yield self.low + i
+
+    def items(self):
+        for key in self:
+            yield key, self[key]
+
+
+# The counting versions count every lookup under name, like
+# profiling.CountingDict.
+class CountingIntMap(IntMap):
+    __slots__ = ("name", )
+
+    def __getitem__(self, key):
+        profiling.counters[self.name] += 1
+        return IntMap.__getitem__(self, key)
+
+    def __contains__(self, key):
+        profiling.counters[self.name] += 1
+        return IntMap.__contains__(self, key)
+
+    def get(self, key, default=None):
+        profiling.counters[self.name] += 1
+        return IntMap.get(self, key, default)
+
+
+class CountingPairMap(PairMap):
+    __slots__ = ("name", )
+
+    def __getitem__(self, key):
+        profiling.counters[self.name] += 1
+        return PairMap.__getitem__(self, key)
+
+    def __contains__(self, key):
+        profiling.counters[self.name] += 1
+        return PairMap.__contains__(self, key)
+
+    def get(self, key, default=None):
+        profiling.counters[self.name] += 1
+        return PairMap.get(self, key, default)
+
+
+# int_map and pair_map return an empty index for keys, whose lookups are
+# counted under name if counters are on. If the keys are too spread out for
+# an array to pay off, it is a dict.
+def int_map(keys, name):
+    return new_index(keys, name, IntMap, CountingIntMap)
+
+
+def pair_map(keys, name):
+    return new_index(keys, name, PairMap, CountingPairMap)
+
+
+def new_index(keys, name, index_class, counting_class):
+    if not keys.is_dense():
+        return counted(name)
+    if not profiling.counting:
+        return index_class(keys)
+    mapping = counting_class(keys)
+    mapping.name = name
+    return mapping
+
+
+# Groups splits the keys of group_of (an IntMap or a dict) into count
+# numbered groups, stored CSR style: the members of group g are
+# members[offsets[g]:offsets[g + 1]].
+class Groups(object):
+    def __init__(self, group_of, count):
+        self.group_of = group_of
+        self.offsets = array('i', [0]) * (count + 1)
+        for _, g in group_of.items():
+            self.offsets[g + 1] += 1
+        for g in range(count):
+            self.offsets[g + 1] += self.offsets[g]
+        self.members = array('i', [0]) * self.offsets[count]
+        filled = array('i', self.offsets[:count])
+        for key, g in group_of.items():
+            self.members[filled[g]] = key
+            filled[g] += 1
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, g):
+        if g < 0:
+            g += len(self)
+        if g < 0 or g >= len(self):
+            raise IndexError("group index out of range")
+        return Group(self, g)
+
+    def __iter__(self):
+        for g in range(len(self)):
+            yield Group(self, g)
+
+
+# Group is a set-like view of one group of a Groups.
+class Group(object):
+    __slots__ = ("groups", "g")
+
+    def __init__(self, groups, g):
+        self.groups = groups
+        self.g = g
+
+    def __len__(self):
+        return self.groups.offsets[self.g + 1] - self.groups.offsets[self.g]
+
+    def __iter__(self):
+        offsets = self.groups.offsets
+        return iter(self.groups.members[offsets[self.g]:offsets[self.g + 1]])
+
+    def __contains__(self, key):
+        return self.groups.group_of.get(key, MISSING) == self.g
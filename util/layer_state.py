@@ -1,21 +1,33 @@
-from copy import deepcopy
+from array import array
+from bisect import bisect_right
+from util.layer_index import Groups, KeyRange, int_map, pair_map
+from util.profiling import counted, traced
+
 
 class LayerState:
     def __init__(self, vertices, cycles, cycle_verts, trees, supports, paths,
-                 vertex_to_cycle_above):
+                 vertex_to_cycle_above, embedding):
         self.vertices = vertices
+        # The half-edge embedding of the whole graph. vertices only holds the
+        # edges of this layer, so it is used to filter the embedding.
+        self.embedding = embedding
+        # The indexes below are arrays over the vertices of this layer (see
+        # util/layer_index.py), keyed by vertex_keys or tree_keys.
+        self.vertex_keys = KeyRange.of(vertices)
+        self.tree_keys = KeyRange(0, len(trees) - 1, len(trees))
 
         self.cycles = cycles
         self.cycle_verts = cycle_verts
-        self.vertex_to_cycle = dict()
+        self.vertex_to_cycle = int_map(self.vertex_keys,
+                                       "layer_index_lookups")
         for i, cycle in enumerate(cycles):
             for u, v in cycle:
                 self.vertex_to_cycle[u] = i
                 self.vertex_to_cycle[v] = i
 
-        # Note that cycle_paths it is the cycle equivalent of v_by_tree, but it is an ordered list representing
+        # Note that cycle_paths it is the cycle equivalent of v_by_tree, but it is an ordered array representing
         # a clockwise traversal of the cycle, unlike v_by_tree, which is just a set.
-        self.cycle_paths = [[] for _ in cycles]
+        self.cycle_paths = [array('i') for _ in cycles]
         marked = set()
         for path in paths:
             for v in path:
@@ -24,46 +36,54 @@ class LayerState:
                 marked.add(v)
                 self.cycle_paths[self.vertex_to_cycle[v]].append(v)
 
-        self.vertex_to_cycle_index = dict()
+        self.vertex_to_cycle_index = pair_map(self.vertex_keys,
+                                              "layer_index_lookups")
         for c, path in enumerate(self.cycle_paths):
             for i, v in enumerate(path):
                 self.vertex_to_cycle_index[v] = (c, i)
 
+        # next_inner_vertex maps every cycle vertex to the first vertex
+        # clockwise from it on its cycle that is an inner (degree 2) vertex, or
+        # to itself if there is none. It only depends on the cyclic order of
+        # each path, so it stays correct when set_path_above rotates them.
+        self.next_inner_vertex = int_map(self.vertex_keys,
+                                         "layer_index_lookups")
+        for path in self.cycle_paths:
+            self.link_inner_vertices(path)
+
         self.trees = trees
+        # supports is updated in place during the reassembly.
         self.supports = supports
-        self.support_originals = deepcopy(supports)
-        self.support_count_original = dict()
+        self.support_count_original = int_map(self.tree_keys,
+                                              "layer_index_lookups")
         for t in range(len(self.trees)):
             self.support_count_original[t] = len(supports[t])
 
-        self.tree_cycle_to_support_vertex = dict()
+        self.tree_cycle_to_support_vertex = counted("layer_index_lookups")
         for t, support in enumerate(self.supports):
             for v in support:
                 self.tree_cycle_to_support_vertex[(
                     t, self.vertex_to_cycle[v])] = v
 
-        self.v_by_tree = []
-
+        # Trees never share a vertex, so v_by_tree[t] is simply the vertices
+        # that vertex_to_tree maps to t.
+        self.vertex_to_tree = int_map(self.vertex_keys,
+                                      "layer_index_lookups")
         for i, tree in enumerate(trees):
-            v_tree = set()
             for u, v in tree:
-                v_tree.add(u)
-                v_tree.add(v)
-            self.v_by_tree.append(v_tree)
+                self.vertex_to_tree[u] = i
+                self.vertex_to_tree[v] = i
+        self.v_by_tree = Groups(self.vertex_to_tree, len(trees))
 
         self.paths = paths
 
-        self.vertex_to_path_index = dict()
+        self.vertex_to_path_index = pair_map(self.vertex_keys,
+                                             "layer_index_lookups")
         for i, path in enumerate(paths):
             for j, v in enumerate(path):
                 if len(self.vertices[v]) == 2:
                     self.vertex_to_path_index[v] = (i, j)
 
-        self.vertex_to_tree = dict()
-        for i, v_tree in enumerate(self.v_by_tree):
-            for v in v_tree:
-                self.vertex_to_tree[v] = i
-
         self.trees_by_cycle = [set() for _ in self.cycles]
         for c, v_cycle in enumerate(self.cycle_paths):
             for v in v_cycle:
@@ -71,7 +91,8 @@ class LayerState:
                     continue
                 self.trees_by_cycle[c].add(self.vertex_to_tree[v])
 
-        self.final_support_vertex = dict()
+        self.final_support_vertex = int_map(self.vertex_keys,
+                                            "layer_index_lookups")
 
         # Note that vertex_to_cycle_above != vertex_to_cycle for the layer above this one
         # Whereas only vertices on a particular cycle are included in vertex_to_cycle for the layer above
@@ -79,13 +100,38 @@ class LayerState:
         # except for the outermost cycle vertices, but then they are themselves contained in a cycle
         # However, a leaf vertex that is a degree 1 vertex on this layer appears in both veretex_to_cycle_above
         # and vertex_to_cycle for the layer above this one, and the cycle as the dictionary value is the same
-        self.vertex_to_cycle_above = vertex_to_cycle_above
+        self.vertex_to_cycle_above = int_map(self.vertex_keys,
+                                             "layer_index_lookups")
+        for v, c in vertex_to_cycle_above.items():
+            self.vertex_to_cycle_above[v] = c
+
+    def link_inner_vertices(self, path):
+        first = -1
+        for i, v in enumerate(path):
+            if len(self.vertices[v]) == 2:
+                first = i
+                break
+        if first == -1:
+            for v in path:
+                self.next_inner_vertex[v] = v
+            return
 
+        # Walk counterclockwise from the first inner vertex all the way around
+        # to it, remembering the last inner vertex seen.
+        next_inner = path[first]
+        for step in range(1, len(path) + 1):
+            v = path[(first - step) % len(path)]
+            self.next_inner_vertex[v] = next_inner
+            if len(self.vertices[v]) == 2:
+                next_inner = v
+
+    @traced
     def set_path_above(self, ls_a):
         # Like trees_by_cycle, but counting trees with inward vertices instead of outward vertices
         # Note that trees_by_cycle for the layer above != trees_by_cycle_above for this layer
         self.trees_by_cycle_above = [set() for _ in ls_a.cycles]
-        self.tree_to_cycle_above = dict()
+        self.tree_to_cycle_above = int_map(self.tree_keys,
+                                           "layer_index_lookups")
         for t in range(len(self.trees)):
             for v in self.v_by_tree[t]:
                 if v in ls_a.vertex_to_cycle:
@@ -97,63 +143,130 @@ class LayerState:
         # Now that we know the trees that are enclosed within the cycles on the layer above,
         # it is time to reorder the cycles such that the first element in each path is the
         # first vertex (clockwise) of the first tree
+        ls_a.vertex_to_cycle_index = pair_map(ls_a.vertex_keys,
+                                              "layer_index_lookups")
+        self.tree_to_nonconsec = dict()
+        self.nonconsec_to_successor = int_map(self.vertex_keys,
+                                              "layer_index_lookups")
+        self.vertex_to_sibling_predecessor = int_map(self.vertex_keys,
+                                                     "layer_index_lookups")
+        for t in range(len(self.trees)):
+            self.tree_to_nonconsec[t] = set()
+
+        # cycle_profiles holds a CycleProfile of every cycle on the layer
+        # above, for prep_cycle.
+        self.cycle_profiles = []
         for c, path in enumerate(ls_a.cycle_paths):
-            start_tree = -1
-            for v in [path[0]] + path[:0:-1]:
-                if not v in self.vertex_to_tree:
-                    continue
-                t = self.vertex_to_tree[v]
-                if start_tree == -1:
-                    start_tree = t
-                if t != start_tree:
-                    break
-            _, i = ls_a.vertex_to_cycle_index[v]
-            i = (i + 1) % len(path)
+            i = self.path_start(path)
             path = path[i:] + path[:i]
             ls_a.cycle_paths[c] = path
+            self.link_path(ls_a, c, path)
+            self.cycle_profiles.append(CycleProfile(path, self.vertex_to_tree))
 
-        # As a result, we must reuse vertex_to_cycle_index
-        ls_a.vertex_to_cycle_index = dict()
-        for c, path in enumerate(ls_a.cycle_paths):
-            for i, v in enumerate(path):
-                ls_a.vertex_to_cycle_index[v] = (c, i)
+    # path_start walks counterclockwise from the start of path, past the run of
+    # vertices of the first tree it meets, and returns the index just after
+    # the first vertex of another tree.
+    def path_start(self, path):
+        start_tree = -1
+        j = 0
+        for step in range(len(path)):
+            j = (len(path) - step) % len(path)
+            v = path[j]
+            if not v in self.vertex_to_tree:
+                continue
+            t = self.vertex_to_tree[v]
+            if start_tree == -1:
+                start_tree = t
+            if t != start_tree:
+                break
+        return (j + 1) % len(path)
 
-        self.tree_to_nonconsec = dict()
-        self.nonconsec_to_successor = dict()
-        for t in range(len(self.trees)):
-            self.tree_to_nonconsec[t] = set()
+    # link_path indexes the (already rotated) path of cycle c on the layer
+    # above, and in a single counterclockwise pass finds for every tree vertex
+    # on it the next tree vertex clockwise (its successor, if it belongs to
+    # another tree) and the previous vertex of the same tree.
+    def link_path(self, ls_a, c, path):
+        # The vertex of each tree seen last, which is the next one clockwise.
+        sibling_after = dict()
+        last_of_tree = dict()
+        next_tree_vertex = None
+        last_tree_vertex = None
+        for i in range(len(path) - 1, -1, -1):
+            v = path[i]
+            ls_a.vertex_to_cycle_index[v] = (c, i)
+            if not v in self.vertex_to_tree:
+                continue
+            t = self.vertex_to_tree[v]
 
-        for path in ls_a.cycle_paths:
-            path = [path[-1]] + path
-            for i, v in enumerate(path[:-1]):
-                offset = 1
-                index = (i + offset) % len(path)
-                u = path[index]
-                if not v in self.vertex_to_tree:
-                    continue
-                while not u in self.vertex_to_tree:
-                    offset += 1
-                    index = (i + offset) % len(path)
-                    u = path[index]
-                t = self.vertex_to_tree[v]
-                if self.vertex_to_tree[u] != t:
-                    self.tree_to_nonconsec[t].add(v)
-                    self.nonconsec_to_successor[v] = u
-
-        last_vertex_from_tree = dict()
-        self.vertex_to_sibling_predecessor = dict()
-        for path in ls_a.cycle_paths:
-            # We must make 2 full loops so that the first vertex of every tree gets its predecessor
-            # set correctly.
-            path = path * 2
-            for v in path:
-                if not v in self.vertex_to_tree:
-                    continue
-                t = self.vertex_to_tree[v]
-                if not t in last_vertex_from_tree:
-                    last_vertex_from_tree[t] = v
-                    continue
+            if next_tree_vertex == None:
+                # The successor of the last tree vertex wraps around to the
+                # first one, which is only known once the pass is over.
+                last_tree_vertex = v
+            else:
+                self.add_successor(v, t, next_tree_vertex)
+            next_tree_vertex = v
+
+            if t in sibling_after:
+                self.vertex_to_sibling_predecessor[sibling_after[t]] = v
+            else:
+                last_of_tree[t] = v
+            sibling_after[t] = v
+
+        if last_tree_vertex == None:
+            return
+        self.add_successor(last_tree_vertex,
+                           self.vertex_to_tree[last_tree_vertex],
+                           next_tree_vertex)
+        for t, v in sibling_after.items():
+            self.vertex_to_sibling_predecessor[v] = last_of_tree[t]
+
+    def add_successor(self, v, t, u):
+        if self.vertex_to_tree[u] != t:
+            self.tree_to_nonconsec[t].add(v)
+            self.nonconsec_to_successor[v] = u
+
+
+# CycleProfile describes the trees of one layer that touch a cycle on the
+# layer above, as the runs of consecutive cycle vertices that belong to the
+# same tree. Run k covers path[starts[k]:ends[k]] and belongs to trees[k], and
+# leaf_count maps every tree to its number of vertices on the cycle. Which
+# trees are Type A or Type B changes as supports shrink, so that is left for
+# prep_cycle to look up.
+class CycleProfile(object):
+    def __init__(self, path, vertex_to_tree):
+        self.length = len(path)
+        self.starts = []
+        self.ends = []
+        self.trees = []
+        self.leaf_count = dict()
+        for i, v in enumerate(path):
+            if not v in vertex_to_tree:
+                continue
+            t = vertex_to_tree[v]
+            if not t in self.leaf_count:
+                self.leaf_count[t] = 0
+            self.leaf_count[t] += 1
+            if len(self.ends) != 0 and self.ends[-1] == i and self.trees[-1] == t:
+                self.ends[-1] = i + 1
+                continue
+            self.starts.append(i)
+            self.ends.append(i + 1)
+            self.trees.append(t)
 
-                self.vertex_to_sibling_predecessor[v] = last_vertex_from_tree[
-                    t]
-                last_vertex_from_tree[t] = v
\ No newline at end of file
+    # segments yields (index, tree, length) for every run in clockwise order,
+    # as if the path started at origin. A run that origin falls inside is
+    # split in two, with its first part coming last.
+    def segments(self, origin):
+        k = bisect_right(self.starts, origin) - 1
+        split = k >= 0 and origin < self.ends[k]
+        if split:
+            yield origin, self.trees[k], self.ends[k] - origin
+        for j in range(k + 1, k + 1 + len(self.starts)):
+            j %= len(self.starts)
+            if j == k:
+                break
+            yield self.starts[j], self.trees[j], self.ends[j] - self.starts[j]
+        if split and origin > self.starts[k]:
+            yield self.starts[k], self.trees[k], origin - self.starts[k]
+        elif not split and k >= 0:
+            yield self.starts[k], self.trees[k], self.ends[k] - self.starts[k]
@@ -0,0 +1,188 @@
+from collections import OrderedDict
+from functools import wraps
+from types import BuiltinFunctionType, FunctionType, MethodType, ModuleType
+import os
+import sys
+import tracemalloc
+
+# Opt-in accounting of where the memory of a reassembly goes. The pipeline
+# takes a checkpoint after reading the graph, after every layer of
+# start_phase, after set_path_above and after the KS Algorithm. Each one
+# records the memory traced by tracemalloc at that point, the source lines
+# that allocated the most of it and the size of every structure that is
+# alive, found by walking it. The parts of an object are sized separately
+# and added up per class, so
+#
+#   LayerState.vertex_to_cycle
+#
+# is the size of that index summed over every layer. Anything reachable from
+# more than one structure is only counted for the first one, so the shared
+# graph and embedding are given first (or left out, with exclude).
+#
+# Nothing is recorded until enable() is called. Tracing every allocation
+# makes a run several times slower, so this is for finding what to compact,
+# not for timing.
+
+enabled = False
+checkpoints = []
+top_lines = 5
+root_directory = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class Checkpoint(object):
+    def __init__(self, name, current, peak, sizes, lines):
+        self.name = name
+        # The traced memory in bytes at the checkpoint and the most it has
+        # been since the previous one.
+        self.current = current
+        self.peak = peak
+        # sizes maps every structure to its size in bytes, largest first.
+        self.sizes = sizes
+        # lines lists the source lines that allocated the most of the memory
+        # in use, as (file:line, bytes).
+        self.lines = lines
+
+
+def enable():
+    global enabled
+    enabled = True
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def disable():
+    global enabled
+    enabled = False
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def reset():
+    del checkpoints[:]
+    if tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+
+
+# checkpoint records the memory in use under name. Every keyword argument is
+# a structure to size: an object is sized attribute by attribute, a list of
+# objects (such as the layer states) is sized attribute by attribute for every
+# one of them, and anything else is sized as a whole. Nothing reachable from
+# the structures in exclude is counted.
+def checkpoint(name, exclude=(), **roots):
+    if not enabled:
+        return
+    current, peak = tracemalloc.get_traced_memory()
+
+    snapshot = tracemalloc.take_snapshot().filter_traces(
+        [tracemalloc.Filter(False, tracemalloc.__file__),
+         tracemalloc.Filter(False, __file__)])
+    lines = []
+    for stat in snapshot.statistics("lineno")[:top_lines]:
+        frame = stat.traceback[0]
+        lines.append(("%s:%d" % (source_name(frame.filename), frame.lineno),
+                      stat.size))
+    del snapshot
+
+    seen = set()
+    for structure in exclude:
+        deep_sizeof(structure, seen)
+    sizes = OrderedDict()
+    for root_name, root in roots.items():
+        for part, value in parts(root_name, root):
+            sizes[part] = sizes.get(part, 0) + deep_sizeof(value, seen)
+    sizes = OrderedDict(sorted(sizes.items(), key=lambda item: -item[1]))
+
+    checkpoints.append(Checkpoint(name, current, peak, sizes, lines))
+    tracemalloc.reset_peak()
+
+
+# checkpointed takes a checkpoint with the result of every call to the
+# function, sized as root.
+def checkpointed(name, root):
+    def decorate(fun):
+        @wraps(fun)
+        def wrapper(*args, **kwargs):
+            result = fun(*args, **kwargs)
+            if enabled:
+                checkpoint(name, **{root: result})
+            return result
+
+        return wrapper
+
+    return decorate
+
+
+# parts splits a root passed to checkpoint into the named values to size.
+def parts(root_name, root):
+    if isinstance(root, list) and len(root) != 0 and hasattr(root[0],
+                                                             "__dict__"):
+        for value in root:
+            for part in parts(root_name, value):
+                yield part
+        return
+    if hasattr(root, "__dict__") and not isinstance(root, skipped_types):
+        owner = type(root).__name__
+        for attribute, value in vars(root).items():
+            yield owner + "." + attribute, value
+        # What is left is the object itself.
+        yield owner, root
+        return
+    yield root_name, root
+
+
+def source_name(file_path):
+    name = os.path.relpath(file_path, root_directory)
+    if name.startswith(os.pardir):
+        return os.path.basename(file_path)
+    return name
+
+
+skipped_types = (type, ModuleType, FunctionType, BuiltinFunctionType,
+                 MethodType)
+
+
+# deep_sizeof returns the size in bytes of value and everything reachable from
+# it that is not in seen yet, and adds all of it to seen.
+def deep_sizeof(value, seen):
+    size = 0
+    stack = [value]
+    while len(stack) != 0:
+        value = stack.pop()
+        if id(value) in seen or isinstance(value, skipped_types):
+            continue
+        seen.add(id(value))
+        size += sys.getsizeof(value)
+        if isinstance(value, dict):
+            stack.extend(value.keys())
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple, set, frozenset)):
+            stack.extend(value)
+        elif isinstance(value, (str, bytes, bytearray, int, float)):
+            continue
+        else:
+            if hasattr(value, "__dict__"):
+                stack.append(value.__dict__)
+            for cls in type(value).__mro__:
+                slots = getattr(cls, "__slots__", ())
+                if isinstance(slots, str):
+                    slots = (slots, )
+                for slot in slots:
+                    if hasattr(value, slot):
+                        stack.append(getattr(value, slot))
+    return size
+
+
+def format_report(vertex_count=None, rows=8):
+    lines = []
+    for point in checkpoints:
+        lines.append("{:<32} {:>10.1f} MB traced {:>10.1f} MB peak".format(
+            point.name, point.current / 2**20, point.peak / 2**20))
+        for part, size in list(point.sizes.items())[:rows]:
+            line = "  {:<40} {:>10.1f} MB".format(part, size / 2**20)
+            if vertex_count:
+                line += " {:>10.1f} B/vertex".format(size / vertex_count)
+            lines.append(line)
+        for location, size in point.lines:
+            lines.append("  + {:<38} {:>10.1f} MB".format(location,
+                                                          size / 2**20))
+    return "\n".join(lines)
@@ -0,0 +1,64 @@
+from array import array
+
+
+# MergeTree records the reassembly as a binary tree of steps. Step i is either
+# a leaf, where the single vertex vertex[i] is collapsed, or the union of the
+# earlier steps left[i] and right[i]. The whole reassembly is three int arrays
+# of at most 2n - 1 entries, however deep the tree is.
+class MergeTree(object):
+    def __init__(self, n):
+        size = max(0, 2 * n - 1)
+        self.left = array('l', [-1]) * size
+        self.right = array('l', [-1]) * size
+        self.vertex = array('l', [-1]) * size
+        self.size = 0
+
+    def add_leaf(self, v):
+        self.vertex[self.size] = v
+        self.size += 1
+        return self.size - 1
+
+    def add_union(self, a, b):
+        self.left[self.size] = a
+        self.right[self.size] = b
+        self.size += 1
+        return self.size - 1
+
+    def __len__(self):
+        return self.size
+
+    def is_leaf(self, i):
+        return self.vertex[i] != -1
+
+    # vertices yields every vertex that step i is made of.
+    def vertices(self, i):
+        stack = [i]
+        while len(stack) != 0:
+            i = stack.pop()
+            if self.vertex[i] != -1:
+                yield self.vertex[i]
+                continue
+            stack.append(self.right[i])
+            stack.append(self.left[i])
+
+
+# StepSets is a list-like view of a MergeTree, where entry i is the set of
+# vertices of step i. Nothing is stored: each set is built when it is asked
+# for, so holding the view costs nothing even for a chain-shaped tree.
+class StepSets(object):
+    def __init__(self, tree):
+        self.tree = tree
+
+    def __len__(self):
+        return len(self.tree)
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self.tree)
+        if i < 0 or i >= len(self.tree):
+            raise IndexError("step index out of range")
+        return frozenset(self.tree.vertices(i))
+
+    def __iter__(self):
+        for i in range(len(self.tree)):
+            yield frozenset(self.tree.vertices(i))
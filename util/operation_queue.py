@@ -0,0 +1,34 @@
+from collections import deque
+
+
+# OperationQueue holds one FIFO queue of operations per E-outerplanarity layer
+# and always hands out the oldest operation of the deepest layer that has any.
+# The layers that have operations waiting are kept as the set bits of
+# nonempty, so finding the deepest one is a single bit_length rather than a
+# scan over every layer.
+class OperationQueue(object):
+    def __init__(self, planarity):
+        self.queues = [deque() for layer in range(planarity)]
+        self.nonempty = 0
+
+    def push(self, layer, op, arg):
+        self.queues[layer].append((op, arg))
+        self.nonempty |= 1 << layer
+
+    # pop returns (layer, op, arg) for the next operation, or None once every
+    # queue is empty.
+    def pop(self):
+        if self.nonempty == 0:
+            return None
+        layer = self.nonempty.bit_length() - 1
+        queue = self.queues[layer]
+        op, arg = queue.popleft()
+        if len(queue) == 0:
+            self.nonempty &= ~(1 << layer)
+        return layer, op, arg
+
+    def __getitem__(self, layer):
+        return self.queues[layer]
+
+    def __len__(self):
+        return sum(len(queue) for queue in self.queues)
@@ -0,0 +1,217 @@
+from collections import Counter, OrderedDict
+from functools import wraps
+from time import perf_counter
+import json
+import os
+
+# Opt-in tracing of where a reassembly spends its time. Code marks the work it
+# does with spans, either
+#
+#   with profiling.span("parse_cycles", layer=planarity):
+#       ...
+#
+# or by decorating a function with @profiling.traced. Nothing is recorded
+# until enable() is called, and while it is disabled a span is a shared object
+# that does nothing, so the spans can stay in the hot paths.
+#
+# The recorded spans can be written out as a Chrome trace (open it in
+# chrome://tracing or https://ui.perfetto.dev) or summed up per name.
+#
+# Separately, counters tally the elementary steps of the algorithm (vertices
+# walked, lookups made, operations run). Unlike times they are the same on
+# every run, so dividing them by the number of vertices shows exactly which
+# part of the algorithm stops being linear as graphs grow. They are turned on
+# with enable_counters().
+
+enabled = False
+# Every finished span, as [name, start, duration, self duration, args] with
+# times in seconds from origin.
+events = []
+origin = perf_counter()
+# The spans that are currently open, innermost last.
+open_spans = []
+
+
+counting = False
+counters = Counter()
+
+
+def enable():
+    global enabled
+    enabled = True
+
+
+def disable():
+    global enabled
+    enabled = False
+
+
+def enable_counters():
+    global counting
+    counting = True
+
+
+def disable_counters():
+    global counting
+    counting = False
+
+
+def reset():
+    global origin
+    del events[:]
+    del open_spans[:]
+    origin = perf_counter()
+
+
+def reset_counters():
+    counters.clear()
+
+
+def count(name, amount=1):
+    if counting:
+        counters[name] += amount
+
+
+# CountingDict is a dict that counts every lookup made in it under name.
+class CountingDict(dict):
+    __slots__ = ("name", )
+
+    def __getitem__(self, key):
+        counters[self.name] += 1
+        return dict.__getitem__(self, key)
+
+    def __contains__(self, key):
+        counters[self.name] += 1
+        return dict.__contains__(self, key)
+
+    def get(self, key, default=None):
+        counters[self.name] += 1
+        return dict.get(self, key, default)
+
+
+# counted returns an empty dict for an index whose lookups should be counted
+# under name. It is a plain dict unless counters are on.
+def counted(name):
+    if not counting:
+        return dict()
+    mapping = CountingDict()
+    mapping.name = name
+    return mapping
+
+
+class Span(object):
+    __slots__ = ("name", "args", "start", "children")
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.children = 0.0
+        open_spans.append(self)
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        duration = perf_counter() - self.start
+        open_spans.pop()
+        if len(open_spans) != 0:
+            open_spans[-1].children += duration
+        events.append([self.name, self.start - origin, duration,
+                       duration - self.children, self.args])
+        return False
+
+
+class NoSpan(object):
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+no_span = NoSpan()
+
+
+def span(name, **args):
+    if not enabled:
+        return no_span
+    return Span(name, args)
+
+
+# traced records a span named after the function (or name) around every call
+# to it. While tracing is disabled the only cost is one extra call.
+def traced(fun=None, name=None):
+    if fun == None:
+        return lambda fun: traced(fun, name)
+    span_name = name or fun.__name__
+
+    @wraps(fun)
+    def wrapper(*args, **kwargs):
+        if not enabled:
+            return fun(*args, **kwargs)
+        with Span(span_name, {}):
+            return fun(*args, **kwargs)
+
+    return wrapper
+
+
+# summary returns, for every span name, the number of spans, their total time
+# and their self time (the total less the time spent in nested spans), from
+# the most to the least self time.
+def summary():
+    totals = OrderedDict()
+    for name, _, duration, self_duration, _ in events:
+        if not name in totals:
+            totals[name] = [0, 0.0, 0.0]
+        totals[name][0] += 1
+        totals[name][1] += duration
+        totals[name][2] += self_duration
+    rows = [(name, count, total, self_total)
+            for name, (count, total, self_total) in totals.items()]
+    rows.sort(key=lambda row: -row[3])
+    return rows
+
+
+def format_summary():
+    lines = ["{:<24} {:>9} {:>12} {:>12}".format("span", "count", "total (s)",
+                                               "self (s)")]
+    for name, count, total, self_total in summary():
+        lines.append("{:<24} {:>9} {:>12.4f} {:>12.4f}".format(
+            name, count, total, self_total))
+    return "\n".join(lines)
+
+
+# counter_report returns (name, count, count per vertex) for every counter.
+def counter_report(vertex_count):
+    return [(name, counters[name], counters[name] / float(vertex_count))
+            for name in sorted(counters)]
+
+
+def format_counter_report(vertex_count):
+    lines = ["{:<24} {:>12} {:>12}".format("counter", "count",
+                                           "per vertex")]
+    for name, total, per_vertex in counter_report(vertex_count):
+        lines.append("{:<24} {:>12} {:>12.3f}".format(name, total,
+                                                      per_vertex))
+    return "\n".join(lines)
+
+
+def write_chrome_trace(file_path):
+    pid = os.getpid()
+    trace_events = []
+    for name, start, duration, _, args in events:
+        trace_events.append({
+            "name": name,
+            "cat": "ks",
+            "ph": "X",
+            "ts": start * 1e6,
+            "dur": duration * 1e6,
+            "pid": pid,
+            "tid": 0,
+            "args": args,
+        })
+    with open(file_path, "w") as trace_file:
+        json.dump({"traceEvents": trace_events}, trace_file)
@@ -0,0 +1,18 @@
+class ReassemblyResult(object):
+    def __init__(self, rs, planarity, max_alpha):
+        self.planarity = planarity
+        self.max_alpha = max_alpha
+        # indx maps every vertex to the order in which it was collapsed.
+        self.indx = rs.indx
+        # The merge tree holds the reassembly steps, where each step is either
+        # a single vertex being collapsed or the union of two earlier steps.
+        self.merge_tree = rs.merge_tree
+        # Blst[i] is the vertex set of step i, built when it is asked for.
+        self.Blst = rs.Blst
+        # alpha[i] is the number of edges leaving the vertex set of step i.
+        self.alpha = rs.alpha[:len(rs.merge_tree)]
+        # Keep the full state around for anyone that wants to draw the result.
+        self.rs = rs
+
+    def __len__(self):
+        return len(self.merge_tree)
@@ -1,23 +1,39 @@
-from collections import deque
-from copy import deepcopy
+from array import array
+from util.csr_graph import CSRGraph
+from util.merge_tree import MergeTree, StepSets
+from util.operation_queue import OperationQueue
+from util.profiling import count
+
+# super_in[v] is SINGLE while v is still on its own, and otherwise the merge
+# step v is part of.
+SINGLE = -1
 
 
 class ReassemblyState(object):
     def __init__(self, vertices, planarity):
         self.vertices = vertices
 
-        self.super_in = [0] * len(vertices)
-        for v in range(len(vertices)):
-            self.super_in[v] = frozenset([v])
-
-        self.dir_G = deepcopy(vertices)
+        self.super_in = array('l', [SINGLE]) * len(vertices)
+
+        # Every vertex v has a slot for each of its neighbours u, numbered
+        # from edge_offsets[v] in the order of its neighbours (like the
+        # neighbours of a CSRGraph). dir_G holds a byte per slot, which is 1
+        # while the edge between them has not been directed from v to u yet.
+        if isinstance(vertices, CSRGraph):
+            self.edge_offsets = vertices.offsets
+        else:
+            self.edge_offsets = array('l', [0]) * (len(vertices) + 1)
+            for v in range(len(vertices)):
+                self.edge_offsets[v + 1] = (self.edge_offsets[v] +
+                                            len(vertices[v]))
+        self.dir_G = bytearray(b"\x01") * self.edge_offsets[len(vertices)]
         self.collapsed = set()
 
         self.indx = dict()
         self.total_i = 0
         self.vertex_to_super_out = dict()
 
-        self.operations = []
+        self.operations = OperationQueue(planarity)
         self.collapsed_by_cycle = []
         self.tree_has_collapsed = []
         self.tree_has_merged = []
@@ -30,27 +46,68 @@ class ReassemblyState(object):
         # Also, define dictionaries that map trees to various reassembly data about that.
 
         for layer in range(planarity):
-            self.operations.append(deque())
             self.collapsed_by_cycle.append(dict())
             self.tree_has_collapsed.append(dict())
             self.tree_has_merged.append(dict())
             self.tree_will_collapse.append(set())
             self.tree_to_super_out.append(dict())
 
-        self.re_list = [0] * (2 * len(self.vertices) - 1)
-        self.re_index = 0
-
+        self.merge_tree = MergeTree(len(vertices))
+        # Blst[i] is the set of vertices of merge step i.
+        self.Blst = StepSets(self.merge_tree)
+
+        # alpha[i] is the number of edges leaving the vertex set of step i,
+        # kept up to date as steps are added, and max_alpha is the largest.
+        self.alpha = array('l', [0]) * len(self.merge_tree.left)
+        self.max_alpha = 0
+        # Every step that has not been merged into a later one owns a group of
+        # vertices. group[v] is the group v is in, step_group[i] is the group
+        # owned by step i and members[g] lists the vertices of group g.
+        self.group = array('l', [-1]) * len(vertices)
+        self.step_group = array('l', [-1]) * len(self.merge_tree.left)
+        self.members = dict()
+
+    # super_append adds a step collapsing the single vertex v.
     def super_append(self, v):
-        # Should be a set consisiting of v where v is a vertex
-        assert len(v) == 1
-        self.re_list[self.re_index] = v
-        self.re_index += 1
-        return self.re_index - 1
-
+        count("super_append")
+        i = self.merge_tree.add_leaf(v)
+        self.group[v] = i
+        self.step_group[i] = i
+        self.members[i] = [v]
+        self.set_alpha(i, len(self.vertices[v]))
+        return i
+
+    # circle_plus adds a step joining the steps v and u. The edges leaving
+    # the union are the edges leaving either one, less the edges between them,
+    # which are found by walking the smaller of the two. Every vertex then
+    # moves to the group of the larger one, so a vertex is walked at most
+    # log n times over the whole reassembly.
     def circle_plus(self, v, u):
-        self.re_list[self.re_index] = (v, u)
-        self.re_index += 1
-        return self.re_index - 1
+        count("circle_plus")
+        i = self.merge_tree.add_union(v, u)
+        small = self.step_group[v]
+        large = self.step_group[u]
+        if len(self.members[small]) > len(self.members[large]):
+            small, large = large, small
+
+        between = 0
+        small_members = self.members.pop(small)
+        for x in small_members:
+            for y in self.vertices[x]:
+                if self.group[y] == large:
+                    between += 1
+        for x in small_members:
+            self.group[x] = large
+        self.members[large].extend(small_members)
+        self.step_group[i] = large
+
+        self.set_alpha(i, self.alpha[v] + self.alpha[u] - 2 * between)
+        return i
+
+    def set_alpha(self, i, alpha):
+        self.alpha[i] = alpha
+        if alpha > self.max_alpha:
+            self.max_alpha = alpha
 
     def update_indx(self, indx):
         n_i = self.total_i
@@ -59,9 +116,19 @@ class ReassemblyState(object):
             n_i += 1
         self.total_i = n_i
 
+    def edge_slot(self, v, u):
+        start = self.edge_offsets[v]
+        for i, w in enumerate(self.vertices[v]):
+            if w == u:
+                return start + i
+        raise KeyError((v, u))
+
     def direct_edge(self, u, v):
-        if u in self.dir_G[v]:
-            self.dir_G[v].remove_edge(u)
+        self.dir_G[self.edge_slot(v, u)] = 0
+
+    # is_directed returns True if the edge from u to v is directed.
+    def is_directed(self, u, v):
+        return self.dir_G[self.edge_slot(v, u)] == 0
 
     def merge_vertex_to_super_out(self, v, super_v):
         if v in self.collapsed:
@@ -77,17 +144,7 @@ class ReassemblyState(object):
         self.vertex_to_super_out[v] = new_super
 
     def merge_to_super_in(self, v, super_v):
-        Bval = self.super_append(self.super_in[v])
+        assert self.super_in[v] == SINGLE
+        Bval = self.super_append(v)
         new_super = self.circle_plus(Bval, super_v)
         self.super_in[v] = new_super
-
-    def build_Blst(self):
-        self.Blst = [0] * len(self.re_list)
-        for i, v in enumerate(self.re_list):
-            if i >= self.re_index:
-                return
-            if len(v) == 1:
-                self.Blst[i] = v
-            else:
-                u, v = v
-                self.Blst[i] = self.Blst[u].union(self.Blst[v])
@@ -0,0 +1,56 @@
+from array import array
+from math import atan2, pi
+from util.profiling import count
+
+
+def angle_from_twelve(x, y):
+    return (pi / 2 - atan2(y, x) + 2 * pi) % (2 * pi)
+
+
+def angle_delta(from_pos, to_pos):
+    # Our coordinate system has the bottom left as (0,height), so flip the y here
+    return angle_from_twelve(to_pos[0] - from_pos[0], from_pos[1] - to_pos[1])
+
+
+# RotationSystem stores, for every vertex, its neighbours ordered clockwise
+# starting from twelve o'clock. It is the only place angles are computed; the
+# HalfEdgeGraph built from it answers every "next clockwise edge" question.
+# Like a CSRGraph, the order of v is clockwise[offsets[v]:offsets[v + 1]].
+class RotationSystem(object):
+    def __init__(self, vertices=None):
+        self.offsets = array('l', [0])
+        self.clockwise = array('l')
+        if vertices is None:
+            return
+        for v in range(len(vertices)):
+            pos = vertices[v].pos
+            self.clockwise.extend(
+                sorted(vertices[v],
+                       key=lambda u: angle_delta(pos, vertices[u].pos)))
+            self.offsets.append(len(self.clockwise))
+        count("angle_evaluations", len(self.clockwise))
+
+    # from_arrays wraps an order that was computed earlier, such as one stored
+    # in a .graphb file.
+    @staticmethod
+    def from_arrays(offsets, clockwise):
+        rotation = RotationSystem()
+        rotation.offsets = offsets
+        rotation.clockwise = clockwise
+        return rotation
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, v):
+        return self.clockwise[self.offsets[v]:self.offsets[v + 1]]
+
+    # matches checks that every vertex still has the neighbours it had when
+    # the order was computed.
+    def matches(self, vertices):
+        if len(self) != len(vertices):
+            return False
+        for v in range(len(vertices)):
+            if sorted(self[v]) != sorted(vertices[v]):
+                return False
+        return True